@@ -1,43 +1,212 @@
+import array
+import functools
+import importlib.util
+import io
+import itertools
 import logging
 import math
 import os
+import pathlib
+import queue
 import json
-from typing import Any, Dict, List, Optional, Tuple, Union
+import threading
+import time
+import types
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 import sys
 
-# 直接读取config.json文件
-config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-# 跨平台导入 - macOS/Linux 使用 ezdxf，Windows 可选 win32com
+# orjson 可选，解析速度更快；未安装时使用标准库 json
 try:
-    import ezdxf
-    HAS_EZDXF = True
+    import orjson
 except ImportError:
-    HAS_EZDXF = False
+    orjson = None
+
+
+# 读取config.json文件 (路径在导入时解析一次)
+config_path = pathlib.Path(__file__).with_name('config.json')
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(path: Union[str, pathlib.Path], mtime_ns: int) -> Dict[str, Any]:
+    """解析配置文件，按 (路径, 修改时间) 缓存"""
+    data = pathlib.Path(path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_config(path: Union[str, pathlib.Path] = config_path) -> Dict[str, Any]:
+    """返回解析后的配置 (共享对象，调用方不应修改)
+
+    文件未变化时直接返回内存中的快照，修改后自动重新解析。
+    """
+    return _parse_config(path, os.stat(path).st_mtime_ns)
+
+
+config = load_config()
+
+# 跨平台后端 - macOS/Linux 使用 ezdxf，Windows 可选 win32com
+# 导入时只检查库是否存在，真正的导入推迟到 start_cad()，以加快模块加载
+HAS_EZDXF = importlib.util.find_spec("ezdxf") is not None
+if not HAS_EZDXF:
     logging.warning("未找到ezdxf库，将尝试使用win32com")
 
-# 在 Windows 上尝试导入 win32com
-try:
-    import win32com.client
-    import pythoncom
-    HAS_WIN32COM = True
-except ImportError:
-    HAS_WIN32COM = False
+HAS_WIN32COM = (importlib.util.find_spec("win32com") is not None
+                and importlib.util.find_spec("pythoncom") is not None)
+
+# numpy 随 ezdxf 一同安装，用于批量处理点坐标；未加载时退回逐点处理
+np = None
+
+_LAZY_EZDXF = ("ezdxf", "TextEntityAlignment")
+_LAZY_WIN32COM = ("win32com", "pythoncom", "_VARIANT", "_VT_ARRAY_R8", "_VT_ARRAY_DISPATCH")
+
+
+def _import_numpy() -> None:
+    """加载 numpy (可选)"""
+    global np
+    if np is None:
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+
+
+def _import_ezdxf() -> None:
+    """首次使用 ezdxf 后端时导入相关模块"""
+    global ezdxf, TextEntityAlignment
+    if "ezdxf" not in globals():
+        import ezdxf
+        from ezdxf.enums import TextEntityAlignment
+        if not ezdxf.options.use_c_ext:
+            logging.warning("ezdxf C 扩展未启用 (检查 EZDXF_DISABLE_C_EXT)，几何运算和 DXF 读写将变慢")
+    _import_numpy()
+
+
+def _import_win32com() -> None:
+    """首次使用 COM 后端时导入 win32com 并绑定常用常量"""
+    global win32com, pythoncom, _VARIANT, _VT_ARRAY_R8, _VT_ARRAY_DISPATCH
+    if "pythoncom" not in globals():
+        import win32com.client
+        import pythoncom
+        # 预先绑定 VARIANT 构造函数和类型常量，绘图时无需逐次查找属性
+        _VARIANT = win32com.client.VARIANT
+        _VT_ARRAY_R8 = pythoncom.VT_ARRAY | pythoncom.VT_R8
+        _VT_ARRAY_DISPATCH = pythoncom.VT_ARRAY | pythoncom.VT_DISPATCH
+    _import_numpy()
+
+
+def __getattr__(name: str) -> Any:
+    """PEP 562: 外部访问 cad_controller.ezdxf 等延迟导入的名称时再加载"""
+    if name in _LAZY_EZDXF and HAS_EZDXF:
+        _import_ezdxf()
+        return globals()[name]
+    if name in _LAZY_WIN32COM and HAS_WIN32COM:
+        _import_win32com()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 logger = logging.getLogger('cad_controller')
 
+# 角度转弧度系数 (COM 接口使用弧度)
+_DEG2RAD = math.pi / 180.0
+
+# 每个线程只初始化一次 COM 套间，并在进程生命周期内保持
+_com_state = threading.local()
+
+
+def _log_errors(message: str, default: Any = None):
+    """装饰器: 记录方法抛出的异常并返回 default
+
+    代替绘图方法内部的 try/except，使方法本身只保留绘图逻辑。
+    参数与方法签名不符时的 TypeError 照常抛出，调用方能看到具体原因。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except TypeError as e:
+                # 参数绑定失败时回溯只有 wrapper 这一层，尚未进入 func
+                if e.__traceback__.tb_next is None:
+                    raise
+                logger.error(f"{message}: {str(e)}")
+                return default
+            except Exception as e:
+                logger.error(f"{message}: {str(e)}")
+                return default
+        return wrapper
+    return decorator
+
+
+def _ensure_com_initialized() -> None:
+    """在当前线程上初始化 COM (重复调用无开销)"""
+    if not getattr(_com_state, "initialized", False):
+        _import_win32com()
+        pythoncom.CoInitialize()
+        _com_state.initialized = True
+
+
 class CADController:
     """CAD 控制器类 - 支持 Windows (win32com) 和 macOS/Linux (ezdxf)"""
     
+    # 有效的线宽值集合
+    VALID_LINEWEIGHTS = frozenset((0, 5, 9, 13, 15, 18, 20, 25, 30, 35, 40, 50, 53, 60, 70, 80, 90, 100,
+                                   106, 120, 140, 158, 200, 211))
+    
+    # 可通过 draw_batch() 批量调用的绘图方法
+    DRAW_ACTIONS = frozenset(("draw_line", "draw_circle", "draw_arc", "draw_rectangle", "draw_polyline",
+                              "draw_segments", "draw_text", "draw_hatch", "add_dimension",
+                              "bulk_add_lines", "bulk_add_circles"))
+    
+    # 按后端拆分的方法: start_cad() 成功后把 name 绑定为 _name_<后端>，
+    # 绘图时不再逐次判断 use_ezdxf
+    BACKEND_METHODS = ("save_drawing", "create_layer", "draw_line", "draw_circle", "draw_arc",
+                       "draw_polyline", "_draw_lwpolyline", "draw_text", "draw_hatch", "add_dimension",
+                       "bulk_add_lines", "bulk_add_circles",
+                       "draw_line_fast", "draw_circle_fast", "draw_polyline_fast")
+    
+    # batch() 期间临时设置的系统变量 (COM 后端): 关闭命令回显和自动重生成
+    BATCH_SYSVARS = {"CMDECHO": 0, "REGENMODE": 0}
+    
+    # 颜色映射 (DXF 颜色索引)，所有实例共享
+    COLOR_MAP = {
+        0: 0,      # 黑色
+        1: 1,      # 红色
+        2: 2,      # 黄色
+        3: 3,      # 绿色
+        4: 4,      # 青色
+        5: 5,      # 蓝色
+        6: 6,      # 洋红色
+        7: 7,      # 白色
+        256: 256   # 按图层设置
+    }
+    
     def __init__(self):
         """初始化 CAD 控制器"""
         self.app = None
         self.doc = None
+        self._running = False  # start_cad() 成功后为 True，close() 时复位
+        self.model_space = None  # 缓存的模型空间引用
+        self.layers = None  # 缓存的图层表引用
+        self._known_layers = set()  # 已确认存在的图层名
+        self._dxfattribs_cache = {}  # (layer, color, lineweight) -> 只读 DXF 属性
         self.entities = {}  # 存储已创建图形的实体引用
+        self._batch_depth = 0  # batch() 嵌套深度
+        self._batch_lock = threading.RLock()  # 同一时刻只允许一个线程处于 batch() 中
+        self._batch_owner = None  # 持有 batch() 的线程
+        self._variant_cache = {}  # batch() 期间复用的坐标 VARIANT
+        self._io_executor = None  # 后台保存线程，首次 save_drawing_async() 时创建
+        self._pending_saves = []
+        self._ensured_dirs = set()  # 已确认存在的输出目录
+        self._cmd_queue = None  # 后台命令队列，首次 submit() 时创建
+        self._cmd_thread = None
+        self._com_thread = None  # 建立 COM 连接的线程，COM 代理只能在该线程上使用
         
         # 从配置文件加载参数
+        config = load_config()
         self.startup_wait_time = config["cad"].get("startup_wait_time", 20)
         self.command_delay = config["cad"].get("command_delay", 0.5)
         self.cad_type = config["cad"].get("type", "ezdxf")
@@ -46,22 +215,6 @@ class CADController:
         self.output_dir = config["output"].get("directory", "./output")
         self.default_filename = config["output"].get("default_filename", "cad_drawing.dwg")
         
-        # 有效的线宽值列表
-        self.valid_lineweights = [0, 5, 9, 13, 15, 18, 20, 25, 30, 35, 40, 50, 53, 60, 70, 80, 90, 100, 106, 120, 140, 158, 200, 211]
-        
-        # 颜色映射 (DXF 颜色索引)
-        self.color_map = {
-            0: 0,      # 黑色
-            1: 1,      # 红色
-            2: 2,      # 黄色
-            3: 3,      # 绿色
-            4: 4,      # 青色
-            5: 5,      # 蓝色
-            6: 6,      # 洋红色
-            7: 7,      # 白色
-            256: 256   # 按图层设置
-        }
-        
         # 确定使用的后端
         self.use_ezdxf = False
         if HAS_EZDXF:
@@ -89,9 +242,16 @@ class CADController:
     def _start_cad_ezdxf(self) -> bool:
         """使用 ezdxf 创建新的 DXF 文档"""
         try:
+            _import_ezdxf()
             # 创建新的 DXF 文档 (R2010 格式，兼容性好)
             self.doc = ezdxf.new('R2010')
             self.app = {"type": "ezdxf", "version": ezdxf.__version__}
+            self.model_space = self.doc.modelspace()
+            self.layers = self.doc.layers
+            self._known_layers = {layer.dxf.name for layer in self.layers}
+            self._dxfattribs_cache.clear()
+            self._bind_backend("ezdxf")
+            self._running = True
             
             logger.info(f"已创建新的 DXF 文档 (ezdxf v{ezdxf.__version__})")
             return True
@@ -102,8 +262,8 @@ class CADController:
     def _start_cad_win32com(self) -> bool:
         """使用 win32com 连接到本地 CAD 应用程序"""
         try:
-            import pythoncom
-            pythoncom.CoInitialize()
+            _import_win32com()
+            _ensure_com_initialized()
             
             app_id = "AutoCAD.Application"
             app_name = "AutoCAD"
@@ -119,15 +279,14 @@ class CADController:
             
             # 尝试连接到已运行的实例
             try:
-                self.app = win32com.client.GetActiveObject(app_id)
+                self.app = self._early_bind(win32com.client.GetActiveObject(app_id))
                 logger.info(f"已连接到运行中的 {app_name} 实例")
-            except:
+            except pythoncom.com_error:
                 # 启动新实例
                 logger.info(f"正在启动 {app_name} 实例...")
-                self.app = win32com.client.Dispatch(app_id)
+                self.app = self._early_bind(app_id)
                 self.app.Visible = True
-                import time
-                time.sleep(self.startup_wait_time)
+                self._wait_for_documents(self.startup_wait_time)
             
             # 获取或创建文档
             if self.app.Documents.Count == 0:
@@ -135,181 +294,309 @@ class CADController:
             else:
                 self.doc = self.app.ActiveDocument
             
+            # 缓存常用 COM 引用，避免每次绘图都经过 IDispatch 取属性
+            self.model_space = self.doc.ModelSpace
+            self.layers = self.doc.Layers
+            self._known_layers = {self.layers.Item(i).Name for i in range(self.layers.Count)}
+            self._dxfattribs_cache.clear()
+            self._bind_backend("win32com")
+            self._com_thread = threading.get_ident()
+            self._running = True
+            
             logger.info("CAD 已启动并准备就绪")
             return True
         except Exception as e:
             logger.error(f"Win32COM 启动失败: {str(e)}")
             return False
     
+    def _bind_backend(self, backend: str) -> None:
+        """把 BACKEND_METHODS 中的方法绑定为指定后端的实现"""
+        for name in self.BACKEND_METHODS:
+            setattr(self, name, getattr(self, f"_{name.lstrip('_')}_{backend}"))
+    
+    def _unbind_backend(self) -> None:
+        """移除后端绑定，恢复未启动时的默认方法"""
+        for name in self.BACKEND_METHODS:
+            self.__dict__.pop(name, None)
+    
+    def _wait_for_documents(self, timeout: float) -> None:
+        """轮询新启动的 CAD 实例，文档集合可用后立即返回，最多等待 timeout 秒"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.app.Documents.Count > 0:
+                    return
+            except Exception:
+                pass
+            time.sleep(0.1)
+        logger.warning(f"等待 CAD 就绪超时 ({timeout} 秒)")
+    
+    @staticmethod
+    def _early_bind(app: Any) -> Any:
+        """获取早绑定的 COM 对象
+
+        通过 makepy 生成的类型库包装按 dispid 直接调用，省去后期绑定
+        每次访问属性时的 GetIDsOfNames 查询；类型库不可用时退回后期绑定。
+        """
+        try:
+            return win32com.client.gencache.EnsureDispatch(app)
+        except Exception as e:
+            logger.warning(f"早绑定失败，使用后期绑定: {str(e)}")
+            if isinstance(app, str):
+                return win32com.client.Dispatch(app)
+            return app
+    
     def is_running(self) -> bool:
         """检查 CAD 是否正在运行"""
-        return self.app is not None and self.doc is not None
+        return self._running
     
     def save_drawing(self, file_path: str = None) -> bool:
-        """保存当前图纸"""
-        if not self.is_running():
+        """保存当前图纸 (start_cad() 成功后替换为当前后端的实现)"""
+        logger.error("CAD 未运行，无法保存图纸")
+        return False
+    
+    @_log_errors("保存图纸失败", False)
+    def _save_drawing_ezdxf(self, file_path: str = None) -> bool:
+        """ezdxf 后端: 保存当前图纸"""
+        file_path = self._resolve_save_path(file_path)
+        self.doc.saveas(file_path)
+        logger.info(f"图纸已保存到: {file_path}")
+        return True
+    
+    @_log_errors("保存图纸失败", False)
+    def _save_drawing_win32com(self, file_path: str = None) -> bool:
+        """win32com 后端: 保存当前图纸"""
+        file_path = self._resolve_save_path(file_path)
+        # 保存前统一刷新并等待一次，而不是每个图元之后等待
+        self.flush()
+        if self.command_delay:
+            time.sleep(self.command_delay)
+        self.doc.SaveAs(file_path)
+        logger.info(f"图纸已保存到: {file_path}")
+        return True
+    
+    def save_drawing_async(self, file_path: str = None) -> Future:
+        """在后台线程保存当前图纸，立即返回结果为 bool 的 Future
+
+        ezdxf 后端在调用线程中把文档序列化到内存，仅把磁盘写入交给后台；
+        COM 后端把文档接口封送到后台线程的 COM 套间中执行 SaveAs。
+        调用 wait_saves() 等待所有未完成的保存。
+        """
+        if not self._running:
             logger.error("CAD 未运行，无法保存图纸")
-            return False
+            return self._completed_future(False)
         
         try:
-            if file_path is None:
-                # 使用默认输出路径
-                os.makedirs(self.output_dir, exist_ok=True)
-                file_path = os.path.join(self.output_dir, self.default_filename)
-            else:
-                # 创建目录
-                os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            file_path = self._resolve_save_path(file_path)
             
             if self.use_ezdxf:
-                # ezdxf 保存
-                self.doc.saveas(file_path)
+                # 先快照文档内容，后续绘图不会影响本次保存
+                stream = io.StringIO()
+                self.doc.write(stream)
+                job = functools.partial(self._write_dxf_text, file_path, stream.getvalue(),
+                                        self.doc.output_encoding)
             else:
-                # win32com 保存
-                self.doc.SaveAs(file_path)
-            
+                self.flush()
+                doc_stream = pythoncom.CoMarshalInterThreadInterfaceInStream(
+                    pythoncom.IID_IDispatch, self.doc._oleobj_)
+                job = functools.partial(self._save_com_document, file_path, doc_stream)
+        except Exception as e:
+            logger.error(f"保存图纸失败: {str(e)}")
+            return self._completed_future(False)
+        
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cad-save")
+        future = self._io_executor.submit(job)
+        self._pending_saves.append(future)
+        return future
+    
+    def wait_saves(self) -> bool:
+        """等待所有后台保存完成，全部成功时返回 True"""
+        pending, self._pending_saves = self._pending_saves, []
+        return all([future.result() for future in pending])
+    
+    def _resolve_save_path(self, file_path: Optional[str]) -> str:
+        """确定保存路径并创建所在目录"""
+        if file_path is None:
+            # 使用默认输出路径
+            directory = self.output_dir
+            file_path = os.path.join(self.output_dir, self.default_filename)
+        else:
+            directory = os.path.dirname(file_path) or "."
+        # 同一目录只创建一次
+        if directory not in self._ensured_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._ensured_dirs.add(directory)
+        return file_path
+    
+    @staticmethod
+    def _write_dxf_text(file_path: str, text: str, encoding: str) -> bool:
+        """后台线程: 写出已序列化的 DXF 内容"""
+        try:
+            with open(file_path, 'wt', encoding=encoding, errors='dxfreplace') as fp:
+                fp.write(text)
             logger.info(f"图纸已保存到: {file_path}")
             return True
         except Exception as e:
             logger.error(f"保存图纸失败: {str(e)}")
             return False
     
-    def create_layer(self, layer_name: str, color: int = 7) -> bool:
-        """创建新图层"""
-        if not self.is_running():
-            return False
-        
+    @staticmethod
+    def _save_com_document(file_path: str, doc_stream: Any) -> bool:
+        """后台线程: 在本线程的 COM 套间中取回文档并保存"""
         try:
-            if self.use_ezdxf:
-                # ezdxf 创建图层
-                if layer_name not in self.doc.layers:
-                    self.doc.layers.new(name=layer_name, dxfattribs={'color': color})
-                return True
-            else:
-                # win32com 创建图层
-                for i in range(self.doc.Layers.Count):
-                    if self.doc.Layers.Item(i).Name == layer_name:
-                        self.doc.ActiveLayer = self.doc.Layers.Item(i)
-                        return True
-                
-                new_layer = self.doc.Layers.Add(layer_name)
-                self.doc.ActiveLayer = new_layer
-                return True
+            _ensure_com_initialized()
+            doc = win32com.client.Dispatch(
+                pythoncom.CoGetInterfaceAndReleaseStream(doc_stream, pythoncom.IID_IDispatch))
+            doc.SaveAs(file_path)
+            logger.info(f"图纸已保存到: {file_path}")
+            return True
         except Exception as e:
-            logger.error(f"创建图层失败: {str(e)}")
+            logger.error(f"保存图纸失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _completed_future(result: Any) -> Future:
+        """返回一个已完成的 Future (用于提前失败的情况)"""
+        future = Future()
+        future.set_result(result)
+        return future
+    
+    def create_layer(self, layer_name: str, color: int = 7) -> bool:
+        """创建新图层 (start_cad() 成功后替换为当前后端的实现)"""
+        return False
+    
+    @_log_errors("创建图层失败", False)
+    def _create_layer_ezdxf(self, layer_name: str, color: int = 7) -> bool:
+        """ezdxf 后端: 创建新图层"""
+        # 已知图层无需再查找图层表
+        if layer_name in self._known_layers:
+            return True
+        if layer_name not in self.layers:
+            self.layers.new(name=layer_name, dxfattribs={'color': color})
+        self._known_layers.add(layer_name)
+        return True
+    
+    @_log_errors("创建图层失败", False)
+    def _create_layer_win32com(self, layer_name: str, color: int = 7) -> bool:
+        """win32com 后端: 创建新图层并设为当前图层"""
+        # 按名称直接查找，不存在时再添加
+        try:
+            layer = self.layers.Item(layer_name)
+        except Exception:
+            layer = self.layers.Add(layer_name)
+        self.doc.ActiveLayer = layer
+        self._known_layers.add(layer_name)
+        return True
+    
     def draw_line(self, start_point: Tuple[float, float, float],
                   end_point: Tuple[float, float, float], 
                   layer: str = None, color: int = None, lineweight: int = None) -> Any:
-        """绘制直线"""
-        if not self.is_running():
-            return None
+        """绘制直线 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("绘制直线失败")
+    def _draw_line_ezdxf(self, start_point: Tuple[float, float, float],
+                         end_point: Tuple[float, float, float],
+                         layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """ezdxf 后端: 绘制直线"""
+        if (layer is None and color is None and lineweight is None
+                and len(start_point) == 2 and len(end_point) == 2):
+            return self.draw_line_fast(start_point[0], start_point[1], end_point[0], end_point[1])
+        start_point = self._normalize_point(start_point)
+        end_point = self._normalize_point(end_point)
+        dxfattribs = self._get_dxfattribs(layer, color, lineweight)
+        return self.model_space.add_line(start_point, end_point, dxfattribs=dxfattribs)
+    
+    @_log_errors("绘制直线失败")
+    def _draw_line_win32com(self, start_point: Tuple[float, float, float],
+                            end_point: Tuple[float, float, float],
+                            layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """win32com 后端: 绘制直线"""
+        start_array = self._variant_point(self._normalize_point(start_point))
+        end_array = self._variant_point(self._normalize_point(end_point))
         
-        try:
-            # 规范化点数据
-            start_point = self._normalize_point(start_point)
-            end_point = self._normalize_point(end_point)
-            
-            if self.use_ezdxf:
-                # ezdxf 绘制直线
-                dxfattribs = self._get_dxfattribs(layer, color, lineweight)
-                line = self.doc.modelspace().add_line(start_point, end_point, dxfattribs=dxfattribs)
-                return line
-            else:
-                # win32com 绘制直线
-                import win32com.client
-                import pythoncom
-                start_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                       [start_point[0], start_point[1], start_point[2]])
-                end_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                     [end_point[0], end_point[1], end_point[2]])
-                
-                line = self.doc.ModelSpace.AddLine(start_array, end_array)
-                
-                if layer:
-                    self.create_layer(layer)
-                    line.Layer = layer
-                if color is not None:
-                    line.Color = color
-                if lineweight is not None:
-                    line.LineWeight = self.validate_lineweight(lineweight)
-                
-                return line
-        except Exception as e:
-            logger.error(f"绘制直线失败: {str(e)}")
-            return None
+        line = self.model_space.AddLine(start_array, end_array)
+        
+        if layer:
+            self._ensure_layer(layer)
+            line.Layer = layer
+        if color is not None:
+            line.Color = color
+        if lineweight is not None:
+            line.LineWeight = self.validate_lineweight(lineweight)
+        
+        return line
     
     def draw_circle(self, center: Tuple[float, float, float], radius: float,
                     layer: str = None, color: int = None, lineweight: int = None) -> Any:
-        """绘制圆"""
-        if not self.is_running():
-            return None
+        """绘制圆 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("绘制圆失败")
+    def _draw_circle_ezdxf(self, center: Tuple[float, float, float], radius: float,
+                           layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """ezdxf 后端: 绘制圆"""
+        if layer is None and color is None and lineweight is None and len(center) == 2:
+            return self.draw_circle_fast(center[0], center[1], radius)
+        center = self._normalize_point(center)
+        dxfattribs = self._get_dxfattribs(layer, color, lineweight)
+        return self.model_space.add_circle(center, radius, dxfattribs=dxfattribs)
+    
+    @_log_errors("绘制圆失败")
+    def _draw_circle_win32com(self, center: Tuple[float, float, float], radius: float,
+                              layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """win32com 后端: 绘制圆"""
+        center_array = self._variant_point(self._normalize_point(center))
+        circle = self.model_space.AddCircle(center_array, radius)
         
-        try:
-            center = self._normalize_point(center)
-            
-            if self.use_ezdxf:
-                dxfattribs = self._get_dxfattribs(layer, color, lineweight)
-                circle = self.doc.modelspace().add_circle(center, radius, dxfattribs=dxfattribs)
-                return circle
-            else:
-                import win32com.client
-                import pythoncom
-                center_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                        [center[0], center[1], center[2]])
-                circle = self.doc.ModelSpace.AddCircle(center_array, radius)
-                
-                if layer:
-                    self.create_layer(layer)
-                    circle.Layer = layer
-                if color is not None:
-                    circle.Color = color
-                
-                return circle
-        except Exception as e:
-            logger.error(f"绘制圆失败: {str(e)}")
-            return None
+        if layer:
+            self._ensure_layer(layer)
+            circle.Layer = layer
+        if color is not None:
+            circle.Color = color
+        
+        return circle
     
     def draw_arc(self, center: Tuple[float, float, float], radius: float,
                  start_angle: float, end_angle: float,
                  layer: str = None, color: int = None, lineweight: int = None) -> Any:
-        """绘制圆弧"""
-        if not self.is_running():
-            return None
+        """绘制圆弧 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("绘制圆弧失败")
+    def _draw_arc_ezdxf(self, center: Tuple[float, float, float], radius: float,
+                        start_angle: float, end_angle: float,
+                        layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """ezdxf 后端: 绘制圆弧"""
+        center = self._normalize_point(center)
+        dxfattribs = self._get_dxfattribs(layer, color, lineweight)
+        # ezdxf 使用度数表示角度
+        return self.model_space.add_arc(center, radius, start_angle, end_angle, dxfattribs=dxfattribs)
+    
+    @_log_errors("绘制圆弧失败")
+    def _draw_arc_win32com(self, center: Tuple[float, float, float], radius: float,
+                           start_angle: float, end_angle: float,
+                           layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """win32com 后端: 绘制圆弧"""
+        center_array = self._variant_point(self._normalize_point(center))
+        start_rad = start_angle * _DEG2RAD
+        end_rad = end_angle * _DEG2RAD
+        arc = self.model_space.AddArc(center_array, radius, start_rad, end_rad)
         
-        try:
-            center = self._normalize_point(center)
-            
-            if self.use_ezdxf:
-                dxfattribs = self._get_dxfattribs(layer, color, lineweight)
-                # ezdxf 使用度数表示角度
-                arc = self.doc.modelspace().add_arc(center, radius, start_angle, end_angle, dxfattribs=dxfattribs)
-                return arc
-            else:
-                import win32com.client
-                import pythoncom
-                center_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                        [center[0], center[1], center[2]])
-                start_rad = math.radians(start_angle)
-                end_rad = math.radians(end_angle)
-                arc = self.doc.ModelSpace.AddArc(center_array, radius, start_rad, end_rad)
-                
-                if layer:
-                    self.create_layer(layer)
-                    arc.Layer = layer
-                if color is not None:
-                    arc.Color = color
-                
-                return arc
-        except Exception as e:
-            logger.error(f"绘制圆弧失败: {str(e)}")
-            return None
+        if layer:
+            self._ensure_layer(layer)
+            arc.Layer = layer
+        if color is not None:
+            arc.Color = color
+        
+        return arc
     
     def draw_rectangle(self, corner1: Tuple[float, float, float],
                       corner2: Tuple[float, float, float],
                       layer: str = None, color: int = None, lineweight: int = None) -> Any:
         """绘制矩形"""
-        if not self.is_running():
+        if not self._running:
             return None
         
         try:
@@ -332,211 +619,599 @@ class CADController:
             logger.error(f"绘制矩形失败: {str(e)}")
             return None
     
+    def bulk_add_lines(self, lines: Any, layer: str = None, color: int = None,
+                       lineweight: int = None) -> Optional[List[Any]]:
+        """批量绘制互不相连的直线 (start_cad() 成功后替换为当前后端的实现)
+
+        lines 为 [(start_point, end_point), ...] 或形状为 (N, 2, 2|3) 的数组，
+        整批共用一份样式属性，返回创建的实体列表；任一直线绘制失败时返回 None。
+        """
+        return None
+    
+    def _bulk_add_lines_ezdxf(self, lines: Any, layer: str = None, color: int = None,
+                              lineweight: int = None) -> Optional[List[Any]]:
+        """ezdxf 后端: 批量绘制直线，逐条跳过规范化和异常处理"""
+        try:
+            dxfattribs = self._get_dxfattribs(layer, color, lineweight)
+            add_line = self.model_space.add_line
+            return [add_line(start, end, dxfattribs=dxfattribs) for start, end in lines]
+        except Exception as e:
+            logger.error(f"批量绘制直线失败: {str(e)}")
+            return None
+    
+    def _bulk_add_lines_win32com(self, lines: Any, layer: str = None, color: int = None,
+                                 lineweight: int = None) -> Optional[List[Any]]:
+        """win32com 后端: 在一个 batch() 内逐条绘制直线"""
+        entities = []
+        with self.batch():
+            for start, end in lines:
+                line = self.draw_line(start, end, layer, color, lineweight)
+                if line is None:
+                    return None
+                entities.append(line)
+        return entities
+    
+    def bulk_add_circles(self, circles: Any, layer: str = None, color: int = None,
+                         lineweight: int = None) -> Optional[List[Any]]:
+        """批量绘制圆 (start_cad() 成功后替换为当前后端的实现)
+
+        circles 为 [(center, radius), ...]，返回创建的实体列表；任一圆绘制失败时返回 None。
+        """
+        return None
+    
+    def _bulk_add_circles_ezdxf(self, circles: Any, layer: str = None, color: int = None,
+                                lineweight: int = None) -> Optional[List[Any]]:
+        """ezdxf 后端: 批量绘制圆"""
+        try:
+            dxfattribs = self._get_dxfattribs(layer, color, lineweight)
+            add_circle = self.model_space.add_circle
+            return [add_circle(center, radius, dxfattribs=dxfattribs) for center, radius in circles]
+        except Exception as e:
+            logger.error(f"批量绘制圆失败: {str(e)}")
+            return None
+    
+    def _bulk_add_circles_win32com(self, circles: Any, layer: str = None, color: int = None,
+                                   lineweight: int = None) -> Optional[List[Any]]:
+        """win32com 后端: 在一个 batch() 内逐个绘制圆"""
+        entities = []
+        with self.batch():
+            for center, radius in circles:
+                circle = self.draw_circle(center, radius, layer, color, lineweight)
+                if circle is None:
+                    return None
+                entities.append(circle)
+        return entities
+    
+    def draw_line_fast(self, x1: float, y1: float, x2: float, y2: float) -> Any:
+        """在默认图层上以默认样式绘制二维直线 (start_cad() 成功后替换为当前后端的实现)
+
+        跳过点规范化、样式属性和图层检查，供大量绘制简单图元时使用。
+        """
+        return None
+    
+    def _draw_line_fast_ezdxf(self, x1: float, y1: float, x2: float, y2: float) -> Any:
+        """ezdxf 后端: 快速绘制二维直线"""
+        return self.model_space.add_line((x1, y1), (x2, y2))
+    
+    def _draw_line_fast_win32com(self, x1: float, y1: float, x2: float, y2: float) -> Any:
+        """win32com 后端: 快速绘制二维直线"""
+        return self.model_space.AddLine(self._variant_point((x1, y1, 0.0)),
+                                        self._variant_point((x2, y2, 0.0)))
+    
+    def draw_circle_fast(self, x: float, y: float, radius: float) -> Any:
+        """在默认图层上以默认样式绘制二维圆 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    def _draw_circle_fast_ezdxf(self, x: float, y: float, radius: float) -> Any:
+        """ezdxf 后端: 快速绘制二维圆"""
+        return self.model_space.add_circle((x, y), radius)
+    
+    def _draw_circle_fast_win32com(self, x: float, y: float, radius: float) -> Any:
+        """win32com 后端: 快速绘制二维圆"""
+        return self.model_space.AddCircle(self._variant_point((x, y, 0.0)), radius)
+    
+    def draw_polyline_fast(self, points: List[Tuple[float, float]], closed: bool = False) -> Any:
+        """在默认图层上以默认样式绘制二维轻量多段线 (start_cad() 成功后替换为当前后端的实现)
+
+        points 为 (x, y) 点列表，不做规范化和点数检查。
+        """
+        return None
+    
+    def _draw_polyline_fast_ezdxf(self, points: List[Tuple[float, float]], closed: bool = False) -> Any:
+        """ezdxf 后端: 快速绘制二维轻量多段线"""
+        return self.model_space.add_lwpolyline(points, format='xy', close=closed)
+    
+    def _draw_polyline_fast_win32com(self, points: List[Tuple[float, float]], closed: bool = False) -> Any:
+        """win32com 后端: 快速绘制二维轻量多段线"""
+        point_array = _VARIANT(_VT_ARRAY_R8, array.array('d', itertools.chain.from_iterable(points)))
+        pline = self.model_space.AddLightWeightPolyline(point_array)
+        if closed:
+            pline.Closed = True
+        return pline
+    
     def draw_polyline(self, points: List[Tuple[float, float, float]], closed: bool = False,
                       layer: str = None, color: int = None, lineweight: int = None) -> Any:
-        """绘制多段线"""
-        if not self.is_running():
+        """绘制多段线 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("绘制多段线失败")
+    def _draw_polyline_ezdxf(self, points: List[Tuple[float, float, float]], closed: bool = False,
+                             layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """ezdxf 后端: 绘制多段线"""
+        if points is None or len(points) < 2:
+            logger.error("多段线至少需要 2 个点")
+            return None
+        
+        points = self._normalize_points(points)
+        closed = closed and len(points) > 2
+        
+        # 所有点同一高程时使用轻量多段线 (与 draw_segments 共用)，否则保留各点 z 值
+        if self._is_planar(points):
+            return self._draw_lwpolyline(points, closed, layer, color, lineweight)
+        
+        return self.model_space.add_polyline3d(points, close=closed,
+                                               dxfattribs=self._get_dxfattribs(layer, color, lineweight))
+    
+    @_log_errors("绘制多段线失败")
+    def _draw_polyline_win32com(self, points: List[Tuple[float, float, float]], closed: bool = False,
+                                layer: str = None, color: int = None, lineweight: int = None) -> Any:
+        """win32com 后端: 绘制多段线"""
+        if points is None or len(points) < 2:
+            logger.error("多段线至少需要 2 个点")
             return None
         
+        points = self._normalize_points(points)
+        
+        # 所有点同一高程时使用轻量多段线 (二维坐标，实体更小)
+        if self._is_planar(points):
+            return self._draw_lwpolyline(points, closed and len(points) > 2,
+                                         layer, color, lineweight)
+        
+        point_array = _VARIANT(_VT_ARRAY_R8, self._flatten_points(points))
+        pline = self.model_space.AddPolyline(point_array)
+        
+        if closed and len(points) > 2:
+            pline.Closed = True
+        
+        if layer:
+            self._ensure_layer(layer)
+            pline.Layer = layer
+        if color is not None:
+            pline.Color = color
+        
+        return pline
+    
+    def draw_segments(self, segments: List[Tuple[Tuple[float, float, float], Tuple[float, float, float]]],
+                      layer: str = None, color: int = None, lineweight: int = None) -> Optional[List[Any]]:
+        """批量绘制线段
+
+        首尾相接且位于同一高程的连续线段合并为一条轻量多段线，其余线段
+        逐条绘制为直线，以减少路径类图形的实体数量和 COM 调用次数。
+        返回创建的实体列表；未启动或任一段绘制失败时返回 None。
+        """
+        if not self._running:
+            return None
+        
+        entities = []
         try:
-            if not points or len(points) < 2:
-                logger.error("多段线至少需要 2 个点")
-                return None
-            
-            points = [self._normalize_point(p) for p in points]
-            
-            if self.use_ezdxf:
-                dxfattribs = self._get_dxfattribs(layer, color, lineweight)
-                pline = self.doc.modelspace().add_lwpolyline(points, dxfattribs=dxfattribs)
-                if closed:
-                    pline.close()
-                return pline
-            else:
-                import win32com.client
-                import pythoncom
-                point_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                       [coord for p in points for coord in p])
-                pline = self.doc.ModelSpace.AddPolyline(point_array)
-                
-                if closed and len(points) > 2:
-                    pline.Closed = True
-                
-                if layer:
-                    self.create_layer(layer)
-                    pline.Layer = layer
-                if color is not None:
-                    pline.Color = color
-                
-                return pline
+            with self.batch():
+                chain = []
+                for start_point, end_point in segments:
+                    start_point = self._normalize_point(start_point)
+                    end_point = self._normalize_point(end_point)
+                    if chain and start_point == chain[-1] and chain[0][2] == start_point[2] == end_point[2]:
+                        chain.append(end_point)
+                        continue
+                    if not self._emit_segment_chain(chain, layer, color, lineweight, entities):
+                        return None
+                    chain = [start_point, end_point]
+                if not self._emit_segment_chain(chain, layer, color, lineweight, entities):
+                    return None
         except Exception as e:
-            logger.error(f"绘制多段线失败: {str(e)}")
+            logger.error(f"批量绘制线段失败: {str(e)}")
             return None
+        return entities
+    
+    def _emit_segment_chain(self, chain: List[Tuple[float, float, float]], layer: str, color: int,
+                            lineweight: int, entities: List[Any]) -> bool:
+        """绘制一段连续线段: 单段用直线，多段用轻量多段线，失败时返回 False"""
+        if not chain:
+            return True
+        if len(chain) == 2:
+            entity = self.draw_line(chain[0], chain[1], layer, color, lineweight)
+        else:
+            entity = self._draw_lwpolyline(chain, False, layer, color, lineweight)
+        if entity is None:
+            return False
+        entities.append(entity)
+        return True
+    
+    def _draw_lwpolyline(self, points: List[Tuple[float, float, float]], closed: bool,
+                         layer: str, color: int, lineweight: int) -> Any:
+        """绘制二维轻量多段线 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    def _draw_lwpolyline_ezdxf(self, points: List[Tuple[float, float, float]], closed: bool,
+                               layer: str, color: int, lineweight: int) -> Any:
+        """ezdxf 后端: 绘制二维轻量多段线，高程取第一个点的 z 值"""
+        elevation = float(points[0][2])
+        dxfattribs = dict(self._get_dxfattribs(layer, color, lineweight))
+        if elevation:
+            dxfattribs['elevation'] = elevation
+        return self.model_space.add_lwpolyline(points, format='xy', close=closed,
+                                               dxfattribs=dxfattribs)
+    
+    def _draw_lwpolyline_win32com(self, points: List[Tuple[float, float, float]], closed: bool,
+                                  layer: str, color: int, lineweight: int) -> Any:
+        """win32com 后端: 绘制二维轻量多段线，高程取第一个点的 z 值"""
+        elevation = float(points[0][2])
+        point_array = _VARIANT(_VT_ARRAY_R8, self._flatten_points_2d(points))
+        pline = self.model_space.AddLightWeightPolyline(point_array)
+        if closed:
+            pline.Closed = True
+        if elevation:
+            pline.Elevation = elevation
+        if layer:
+            self._ensure_layer(layer)
+            pline.Layer = layer
+        if color is not None:
+            pline.Color = color
+        if lineweight is not None:
+            pline.LineWeight = self.validate_lineweight(lineweight)
+        return pline
+    
+    def draw_batch(self, items: List[Dict[str, Any]], regen: bool = True) -> List[Any]:
+        """按顺序批量执行绘图命令
+
+        items 中每项形如 {"action": "draw_line", "params": {...}}，与
+        process_command 的结构化命令一致。整批共用一次 batch(regen)，模型空间
+        引用和样式属性缓存在各图元之间复用；图元按原顺序创建以保持绘制次序。
+        返回与 items 一一对应的结果列表，失败或不支持的命令对应 None。
+        """
+        if not self._running:
+            return [None] * len(items)
+        
+        results = []
+        with self.batch(regen):
+            for item in items:
+                action = item.get("action")
+                if action not in self.DRAW_ACTIONS:
+                    logger.error(f"批量绘图不支持的命令: {action}")
+                    results.append(None)
+                    continue
+                try:
+                    results.append(getattr(self, action)(**item.get("params", {})))
+                except Exception as e:
+                    logger.error(f"批量绘图命令 {action} 失败: {str(e)}")
+                    results.append(None)
+        return results
     
     def draw_text(self, position: Tuple[float, float, float], text: str,
                   height: float = 2.5, rotation: float = 0,
                   layer: str = None, color: int = None) -> Any:
-        """添加文本"""
-        if not self.is_running():
-            return None
+        """添加文本 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("添加文本失败")
+    def _draw_text_ezdxf(self, position: Tuple[float, float, float], text: str,
+                         height: float = 2.5, rotation: float = 0,
+                         layer: str = None, color: int = None) -> Any:
+        """ezdxf 后端: 添加文本"""
+        position = self._normalize_point(position)
+        dxfattribs = dict(self._get_dxfattribs(layer, color, None))
+        dxfattribs['height'] = height
+        dxfattribs['rotation'] = rotation
+        text_obj = self.model_space.add_text(text, dxfattribs=dxfattribs)
+        text_obj.set_placement(position, align=TextEntityAlignment.BOTTOM_LEFT)  # 左下对齐
+        return text_obj
+    
+    @_log_errors("添加文本失败")
+    def _draw_text_win32com(self, position: Tuple[float, float, float], text: str,
+                            height: float = 2.5, rotation: float = 0,
+                            layer: str = None, color: int = None) -> Any:
+        """win32com 后端: 添加文本"""
+        position_array = self._variant_point(self._normalize_point(position))
+        text_obj = self.model_space.AddText(text, position_array, height)
         
-        try:
-            position = self._normalize_point(position)
-            
-            if self.use_ezdxf:
-                dxfattribs = self._get_dxfattribs(layer, color, None)
-                dxfattribs['height'] = height
-                dxfattribs['rotation'] = rotation
-                text_obj = self.doc.modelspace().add_text(text, dxfattribs=dxfattribs)
-                text_obj.set_placement(position, align=0)  # 左下对齐
-                return text_obj
-            else:
-                import win32com.client
-                import pythoncom
-                position_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                          [position[0], position[1], position[2]])
-                text_obj = self.doc.ModelSpace.AddText(text, position_array, height)
-                
-                if rotation != 0:
-                    text_obj.Rotation = math.radians(rotation)
-                
-                if layer:
-                    self.create_layer(layer)
-                    text_obj.Layer = layer
-                if color is not None:
-                    text_obj.Color = color
-                
-                return text_obj
-        except Exception as e:
-            logger.error(f"添加文本失败: {str(e)}")
-            return None
+        if rotation != 0:
+            text_obj.Rotation = rotation * _DEG2RAD
+        
+        if layer:
+            self._ensure_layer(layer)
+            text_obj.Layer = layer
+        if color is not None:
+            text_obj.Color = color
+        
+        return text_obj
     
     def draw_hatch(self, points: List[Tuple[float, float, float]], pattern_name: str = "SOLID",
                    scale: float = 1.0, layer: str = None, color: int = None) -> Any:
-        """绘制填充图案"""
-        if not self.is_running() or not points or len(points) < 3:
+        """绘制填充图案 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("绘制填充失败")
+    def _draw_hatch_ezdxf(self, points: List[Tuple[float, float, float]], pattern_name: str = "SOLID",
+                          scale: float = 1.0, layer: str = None, color: int = None) -> Any:
+        """ezdxf 后端: 绘制填充图案"""
+        if points is None or len(points) < 3:
             return None
         
-        try:
-            points = [self._normalize_point(p)[:2] for p in points]  # 转为 2D
-            
-            if self.use_ezdxf:
-                dxfattribs = self._get_dxfattribs(layer, color, None)
-                dxfattribs['pattern'] = pattern_name
-                dxfattribs['scale'] = scale
-                
-                # 创建多段线作为边界
-                hatch = self.doc.modelspace().add_hatch(dxfattribs=dxfattribs)
-                
-                # 添加外边界
-                pline = self.doc.modelspace().add_lwpolyline(points)
-                pline.close()
-                hatch.append_polyline_path(pline)
-                
-                return hatch
-            else:
-                # win32com 填充逻辑
-                pline = self.draw_polyline(points, closed=True, layer=layer)
-                if not pline:
-                    return None
-                
-                import win32com.client
-                import pythoncom
-                hatch = self.doc.ModelSpace.AddHatch(0, pattern_name, True)
-                object_ids = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_DISPATCH, [pline])
-                hatch.AppendOuterLoop(object_ids)
-                hatch.PatternScale = scale
-                hatch.Evaluate()
-                
-                if layer:
-                    self.create_layer(layer)
-                    hatch.Layer = layer
-                if color is not None:
-                    hatch.Color = color
-                
-                return hatch
-        except Exception as e:
-            logger.error(f"绘制填充失败: {str(e)}")
+        points = self._normalize_points_2d(points)
+        dxfattribs = self._get_dxfattribs(layer, color, None)
+        
+        # 创建闭合多段线作为边界 (与 COM 后端一致)
+        self.model_space.add_lwpolyline(points, format='xy', close=True, dxfattribs=dxfattribs)
+        
+        # 添加外边界并设置填充图案
+        hatch = self.model_space.add_hatch(dxfattribs=dxfattribs)
+        hatch.paths.add_polyline_path(points, is_closed=True)
+        fill_color = color if color is not None else 256
+        if pattern_name.upper() == "SOLID":
+            hatch.set_solid_fill(color=fill_color)
+        else:
+            hatch.set_pattern_fill(pattern_name, color=fill_color, scale=scale)
+        
+        return hatch
+    
+    @_log_errors("绘制填充失败")
+    def _draw_hatch_win32com(self, points: List[Tuple[float, float, float]], pattern_name: str = "SOLID",
+                             scale: float = 1.0, layer: str = None, color: int = None) -> Any:
+        """win32com 后端: 以闭合多段线为外边界绘制填充图案"""
+        if points is None or len(points) < 3:
             return None
+        
+        points = self._normalize_points_2d(points)
+        pline = self.draw_polyline(points, closed=True, layer=layer)
+        if not pline:
+            return None
+        
+        hatch = self.model_space.AddHatch(0, pattern_name, True)
+        object_ids = _VARIANT(_VT_ARRAY_DISPATCH, [pline])
+        hatch.AppendOuterLoop(object_ids)
+        hatch.PatternScale = scale
+        hatch.Evaluate()
+        
+        if layer:
+            self._ensure_layer(layer)
+            hatch.Layer = layer
+        if color is not None:
+            hatch.Color = color
+        
+        return hatch
     
     def add_dimension(self, start_point: Tuple[float, float, float],
                       end_point: Tuple[float, float, float],
                       text_position: Tuple[float, float, float] = None,
                       textheight: float = 5, layer: str = None, color: int = None) -> Any:
-        """添加线性标注"""
-        if not self.is_running():
-            return None
+        """添加线性标注 (start_cad() 成功后替换为当前后端的实现)"""
+        return None
+    
+    @_log_errors("添加标注失败")
+    def _add_dimension_ezdxf(self, start_point: Tuple[float, float, float],
+                             end_point: Tuple[float, float, float],
+                             text_position: Tuple[float, float, float] = None,
+                             textheight: float = 5, layer: str = None, color: int = None) -> Any:
+        """ezdxf 后端: 添加线性标注"""
+        start_point, end_point, text_position = self._dimension_points(
+            start_point, end_point, text_position)
+        dxfattribs = self._get_dxfattribs(layer, color, None)
         
-        try:
-            start_point = self._normalize_point(start_point)
-            end_point = self._normalize_point(end_point)
-            
-            if text_position is None:
-                # 自动计算文本位置
-                mid_x = (start_point[0] + end_point[0]) / 2
-                mid_y = (start_point[1] + end_point[1]) / 2
-                text_position = (mid_x, mid_y + 5, 0)
-            else:
-                text_position = self._normalize_point(text_position)
-            
-            if self.use_ezdxf:
-                dxfattribs = self._get_dxfattribs(layer, color, None)
-                dxfattribs['text_height'] = textheight
-                
-                # ezdxf 线性标注
-                dim = self.doc.modelspace().add_linear_dimension_2p(
-                    start_point, end_point, text_position, dxfattribs=dxfattribs
-                )
-                return dim
-            else:
-                import win32com.client
-                import pythoncom
-                start_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                       [start_point[0], start_point[1], start_point[2]])
-                end_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                     [end_point[0], end_point[1], end_point[2]])
-                text_pos_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8,
-                                                          [text_position[0], text_position[1], text_position[2]])
-                
-                dimension = self.doc.ModelSpace.AddDimAligned(start_array, end_array, text_pos_array)
-                
-                if textheight:
-                    dimension.TextHeight = textheight
-                if layer:
-                    self.create_layer(layer)
-                    dimension.Layer = layer
-                if color is not None:
-                    dimension.Color = color
-                
-                return dimension
-        except Exception as e:
-            logger.error(f"添加标注失败: {str(e)}")
-            return None
+        # 对齐标注：沿两点方向的线性标注，尺寸线经过文本位置
+        angle = math.degrees(math.atan2(end_point[1] - start_point[1],
+                                        end_point[0] - start_point[0]))
+        dim = self.model_space.add_linear_dim(
+            base=text_position, p1=start_point, p2=end_point, angle=angle,
+            dimstyle='Standard', override={'dimtxt': textheight},
+            dxfattribs=dxfattribs
+        )
+        dim.render()
+        return dim.dimension
+    
+    @_log_errors("添加标注失败")
+    def _add_dimension_win32com(self, start_point: Tuple[float, float, float],
+                                end_point: Tuple[float, float, float],
+                                text_position: Tuple[float, float, float] = None,
+                                textheight: float = 5, layer: str = None, color: int = None) -> Any:
+        """win32com 后端: 添加对齐标注"""
+        start_point, end_point, text_position = self._dimension_points(
+            start_point, end_point, text_position)
+        start_array = self._variant_point(start_point)
+        end_array = self._variant_point(end_point)
+        text_pos_array = self._variant_point(text_position)
+        
+        dimension = self.model_space.AddDimAligned(start_array, end_array, text_pos_array)
+        
+        if textheight:
+            dimension.TextHeight = textheight
+        if layer:
+            self._ensure_layer(layer)
+            dimension.Layer = layer
+        if color is not None:
+            dimension.Color = color
+        
+        return dimension
+    
+    def _dimension_points(self, start_point: Tuple[float, float, float],
+                          end_point: Tuple[float, float, float],
+                          text_position: Optional[Tuple[float, float, float]]) -> Tuple[Tuple[float, float, float], ...]:
+        """规范化标注的起止点，未给出文本位置时取中点上方 5 个单位"""
+        start_point = self._normalize_point(start_point)
+        end_point = self._normalize_point(end_point)
+        if text_position is None:
+            mid_x = (start_point[0] + end_point[0]) / 2
+            mid_y = (start_point[1] + end_point[1]) / 2
+            return start_point, end_point, (mid_x, mid_y + 5, 0)
+        return start_point, end_point, self._normalize_point(text_position)
     
     def validate_lineweight(self, lineweight: int) -> int:
         """验证线宽"""
-        if lineweight is None or lineweight in self.valid_lineweights:
+        if lineweight is None or lineweight in self.VALID_LINEWEIGHTS:
             return lineweight
         logger.warning(f"线宽值 {lineweight} 无效，使用默认值 0")
         return 0
     
     def refresh_view(self) -> None:
         """刷新视图 (仅 Windows COM)"""
-        if not self.use_ezdxf and self.is_running():
+        if not self.use_ezdxf and self._running:
             try:
                 self.doc.Regen(1)
-            except:
+            except pythoncom.com_error as e:
+                logger.warning(f"刷新视图失败: {str(e)}")
+    
+    def flush(self) -> None:
+        """在批量绘图结束时统一刷新视图 (仅 Windows COM)
+
+        绘图方法本身不再等待或重生成，调用方在一批图元绘制完成后
+        (或需要查询图纸状态时) 调用一次即可。
+        """
+        if self.use_ezdxf or not self._running:
+            return
+        try:
+            self.doc.Regen(1)  # acAllViewports = 1
+        except Exception as e:
+            logger.error(f"刷新视图失败: {str(e)}")
+    
+    @contextmanager
+    def batch(self, regen: bool = True):
+        """批量绘图上下文
+
+        在 COM 后端中整批图元只生成一个撤销记录，期间关闭命令回显和自动
+        重生成 (BATCH_SYSVARS)，在最外层退出时恢复原值并统一调用一次
+        flush()；regen=False 时跳过该次刷新。支持嵌套，ezdxf 后端下无额外开销。
+        其他线程的 batch() 会等待当前批次结束。
+        """
+        with self._batch_lock:
+            com = not self.use_ezdxf and self._running
+            self._batch_depth += 1
+            saved_sysvars = {}
+            if self._batch_depth == 1:
+                self._batch_owner = threading.get_ident()
+                if com:
+                    try:
+                        self.doc.StartUndoMark()
+                    except Exception as e:
+                        logger.warning(f"设置撤销起点失败: {str(e)}")
+                    saved_sysvars = self._set_sysvars(self.BATCH_SYSVARS)
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if com and self._batch_depth == 0:
+                    self._set_sysvars(saved_sysvars)
+                    try:
+                        self.doc.EndUndoMark()
+                    except Exception as e:
+                        logger.warning(f"设置撤销终点失败: {str(e)}")
+                    if regen:
+                        self.flush()
+                if self._batch_depth == 0:
+                    self._variant_cache.clear()
+                    self._batch_owner = None
+    
+    def _set_sysvars(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        """设置 CAD 系统变量 (仅 COM)，返回被修改变量的原值"""
+        previous = {}
+        for name, value in values.items():
+            try:
+                old = self.doc.GetVariable(name)
+                if old != value:
+                    self.doc.SetVariable(name, value)
+                    previous[name] = old
+            except Exception as e:
+                logger.warning(f"设置系统变量 {name} 失败: {str(e)}")
+        return previous
+    
+    def submit(self, action: str, *args, **kwargs) -> Future:
+        """把命令放入后台命令队列，立即返回 Future
+
+        命令由专用线程按提交顺序执行，队列中已积累的命令在同一个
+        batch() 内连续执行，不逐批重生成视图 (保存时或调用 flush() 时刷新)。
+        使用 COM 后端时 start_cad 必须通过 submit() 提交，使所有 COM 调用
+        都发生在该线程的套间中；已在其他线程上启动时抛出 RuntimeError。
+        """
+        if not self.use_ezdxf and self._running and (
+                self._cmd_thread is None or self._com_thread != self._cmd_thread.ident):
+            raise RuntimeError("COM 连接不是在命令线程上建立的，请先 close() 再通过 submit(\"start_cad\") 启动")
+        # 执行时再取方法: 排在 start_cad 之后的绘图命令要用到它绑定的后端实现
+        call = functools.partial(self._invoke, action, *args, **kwargs)
+        if self._cmd_queue is None:
+            self._cmd_queue = queue.Queue()
+            self._cmd_thread = threading.Thread(target=self._run_commands, name="cad-commands",
+                                                daemon=True)
+            self._cmd_thread.start()
+        future = Future()
+        self._cmd_queue.put((future, call))
+        return future
+    
+    def _invoke(self, action: str, *args, **kwargs) -> Any:
+        """按名称调用方法"""
+        return getattr(self, action)(*args, **kwargs)
+    
+    def wait_commands(self) -> None:
+        """等待已提交到命令队列的命令全部执行完毕"""
+        if self._cmd_queue is not None:
+            self._cmd_queue.join()
+    
+    def _run_commands(self) -> None:
+        """命令线程: 每次取出队列中积累的全部命令并批量执行"""
+        if not self.use_ezdxf:
+            _ensure_com_initialized()
+        cmd_queue = self._cmd_queue
+        while True:
+            commands = [cmd_queue.get()]
+            try:
+                while True:
+                    commands.append(cmd_queue.get_nowait())
+            except queue.Empty:
                 pass
+            
+            with self.batch(regen=False):
+                for command in commands:
+                    if command is None:
+                        continue
+                    future, call = command
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        future.set_result(call())
+                    except Exception as e:
+                        future.set_exception(e)
+            
+            for _ in commands:
+                cmd_queue.task_done()
+            if None in commands:
+                return
     
-    def close(self) -> None:
-        """关闭 CAD 连接"""
+    def close(self, shutdown: bool = False) -> None:
+        """关闭 CAD 连接
+
+        默认保留当前线程的 COM 套间，以便后续 start_cad() 快速重连；
+        仅在进程退出前传入 shutdown=True 时释放。
+        """
+        if self._cmd_queue is not None:
+            self._cmd_queue.put(None)
+            self._cmd_thread.join()
+            self._cmd_queue = None
+            self._cmd_thread = None
+        self.wait_saves()
+        if self._io_executor is not None:
+            self._io_executor.shutdown()
+            self._io_executor = None
+        self.model_space = None
+        self.layers = None
+        self._known_layers = set()
+        self._dxfattribs_cache.clear()
+        self._unbind_backend()
+        self._running = False
+        self._com_thread = None
+        self.app = None
+        self.doc = None
         try:
-            if not self.use_ezdxf and HAS_WIN32COM:
-                import pythoncom
-                if self.app:
-                    del self.app
+            if shutdown and not self.use_ezdxf and getattr(_com_state, "initialized", False):
                 pythoncom.CoUninitialize()
-        except:
-            pass
+                _com_state.initialized = False
+        except Exception as e:
+            logger.warning(f"释放 COM 失败: {str(e)}")
     
     # ==================== 辅助方法 ====================
     
@@ -546,12 +1221,111 @@ class CADController:
             return (point[0], point[1], 0)
         return tuple(point[:3])
     
-    def _get_dxfattribs(self, layer: str = None, color: int = None, lineweight: int = None) -> Dict[str, Any]:
-        """获取 DXF 属性字典"""
+    def _variant_point(self, point: Tuple[float, float, float]) -> Any:
+        """将三维点包装为 COM 所需的 VT_ARRAY|VT_R8 VARIANT
+
+        当前线程持有的 batch() 期间，相同坐标复用同一个 VARIANT。
+        """
+        if self._batch_owner != threading.get_ident():
+            return _VARIANT(_VT_ARRAY_R8, point)
+        variant = self._variant_cache.get(point)
+        if variant is None:
+            if len(self._variant_cache) >= 1024:
+                self._variant_cache.clear()
+            variant = _VARIANT(_VT_ARRAY_R8, point)
+            self._variant_cache[point] = variant
+        return variant
+    
+    def _normalize_points(self, points: List[Tuple[float, float, float]]) -> Any:
+        """批量规范化点为三维坐标
+
+        安装了 numpy 时一次性转换为 (N, 3) float64 数组，已符合要求的数组
+        直接返回；否则逐点规范化为三维元组列表。
+        """
+        if np is None:
+            return [self._normalize_point(p) for p in points]
+        if isinstance(points, np.ndarray) and points.dtype == np.float64 \
+                and points.ndim == 2 and points.shape[1] == 3:
+            return points
+        try:
+            arr = np.asarray(points, dtype=np.float64)
+        except ValueError:
+            # 二维、三维点混合时逐点规范化
+            return np.array([self._normalize_point(p) for p in points], dtype=np.float64)
+        if arr.ndim != 2 or arr.shape[1] < 2:
+            raise ValueError("点坐标必须是二维或三维")
+        if arr.shape[1] >= 3:
+            return arr[:, :3]
+        normalized = np.zeros((arr.shape[0], 3))
+        normalized[:, :2] = arr
+        return normalized
+    
+    @staticmethod
+    def _normalize_point_2d(point: Tuple[float, ...]) -> Tuple[float, float]:
+        """取点的 x, y 坐标"""
+        return (point[0], point[1])
+    
+    def _normalize_points_2d(self, points: List[Tuple[float, ...]]) -> Any:
+        """批量取点的 x, y 坐标，不经过补齐 z 再截掉的中间步骤"""
+        if np is not None:
+            try:
+                arr = np.asarray(points, dtype=np.float64)
+            except ValueError:
+                # 二维、三维点混合
+                return np.array([self._normalize_point_2d(p) for p in points], dtype=np.float64)
+            if arr.ndim != 2 or arr.shape[1] < 2:
+                raise ValueError("点坐标必须是二维或三维")
+            return arr[:, :2]
+        return [self._normalize_point_2d(p) for p in points]
+    
+    @staticmethod
+    def _is_planar(points: Any) -> bool:
+        """所有点是否位于同一高程"""
+        if np is not None and isinstance(points, np.ndarray):
+            return bool((points[:, 2] == points[0, 2]).all())
+        elevation = points[0][2]
+        return all(p[2] == elevation for p in points)
+    
+    @staticmethod
+    def _flatten_points(points: Any) -> Any:
+        """将点列表展平为连续的 double 序列，供 COM SAFEARRAY 使用"""
+        if np is not None and isinstance(points, np.ndarray):
+            return CADController._ndarray_to_doubles(points)
+        return array.array('d', itertools.chain.from_iterable(points))
+    
+    @staticmethod
+    def _flatten_points_2d(points: Any) -> Any:
+        """将点列表展平为 x, y 交替的 double 序列 (轻量多段线使用)"""
+        if np is not None and isinstance(points, np.ndarray):
+            return CADController._ndarray_to_doubles(points[:, :2])
+        return array.array('d', itertools.chain.from_iterable(p[:2] for p in points))
+    
+    @staticmethod
+    def _ndarray_to_doubles(points: Any) -> array.array:
+        """按缓冲区一次性拷贝 ndarray 为 array('d')，不逐个生成 Python float"""
+        return array.array('d', np.ascontiguousarray(points, dtype=np.float64).tobytes())
+    
+    def _ensure_layer(self, layer_name: str) -> None:
+        """确保图层存在，已知图层直接跳过"""
+        if layer_name not in self._known_layers:
+            self.create_layer(layer_name)
+    
+    def _get_dxfattribs(self, layer: str = None, color: int = None, lineweight: int = None) -> Mapping[str, Any]:
+        """获取 DXF 属性字典
+
+        按 (layer, color, lineweight) 缓存，返回共享的只读映射；
+        需要追加属性的调用方应先复制。
+        """
+        key = (layer, color, lineweight)
+        cached = self._dxfattribs_cache.get(key)
+        if cached is not None:
+            return cached
+        
         dxfattribs = {}
         
         if layer:
-            self.create_layer(layer)
+            if layer not in self._known_layers:
+                self.create_layer(layer)
             dxfattribs['layer'] = layer
         
         if color is not None:
@@ -562,4 +1336,5 @@ class CADController:
             if lineweight is not None:
                 dxfattribs['lineweight'] = lineweight
         
-        return dxfattribs
+        cached = self._dxfattribs_cache[key] = types.MappingProxyType(dxfattribs)
+        return cached
@@ -1,14 +1,37 @@
+import array
+import cmath
+import functools
+import itertools
 import logging
 import math
 import time
 import os
 import json
+import pathlib
+import threading
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+# orjson 可选，解析速度更快；未安装时使用标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 直接读取config.json文件
-config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = json.load(f)
+config_path = pathlib.Path(__file__).with_name('config.json')
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> Dict[str, Any]:
+    """读取并解析配置文件 (每个进程只读取一次)"""
+    data = config_path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+config = _load_config()
 
 try:
     import win32com.client
@@ -18,60 +41,94 @@ except ImportError:
     logging.error("无法导入win32com.client或pythoncom，请确保已安装pywin32库")
     raise
 
+# 预先组合的 VARIANT 类型，避免每次绘图都查找属性并做位运算
+_VARIANT = win32com.client.VARIANT
+_VT_ARRAY_R8 = pythoncom.VT_ARRAY | pythoncom.VT_R8
+_VT_ARRAY_DISPATCH = pythoncom.VT_ARRAY | pythoncom.VT_DISPATCH
+
+# numpy 可选，用于接收 ndarray 形式的点集
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger('cad_controller')
 
+# 角度转弧度系数 (COM 接口使用弧度)
+_DEG2RAD = math.pi / 180.0
+
+# 多段线点数达到该值时用 numpy 整体补齐和展平，点数较少时逐点处理更快
+_NUMPY_MIN_POINTS = 64
+
+# 记录当前线程是否已初始化 COM
+_com_state = threading.local()
+
+# CAD 类型 -> (COM 程序标识符, 显示名称)
+_CAD_APP_IDS = {
+    "autocad": ("AutoCAD.Application", "AutoCAD"),
+    "gcad": ("GCAD.Application", "浩辰CAD"),
+    "gstarcad": ("GCAD.Application", "浩辰CAD"),
+    "zwcad": ("ZWCAD.Application", "中望CAD"),
+}
+
 class CADController:
     """CAD控制器类，负责与CAD应用程序交互"""
     
+    # 有效的线宽值集合，所有实例共享
+    _VALID_LINEWEIGHTS = frozenset((0, 5, 9, 13, 15, 18, 20, 25, 30, 35, 40, 50, 53, 60, 70, 80, 90,
+                                    100, 106, 120, 140, 158, 200, 211))
+    
+    # CECOLOR 的随层/随块取值需写名称而不是颜色索引
+    _CECOLOR_NAMES = {256: "BYLAYER", 0: "BYBLOCK"}
+    
     def __init__(self):
         """初始化CAD控制器"""
         self.app = None
         self.doc = None
+        self.model_space = None  # 缓存的模型空间引用
+        self.layers = None  # 缓存的图层表引用
+        self._viewport = None  # 缓存的活动视口引用
+        self._loop_variant = _VARIANT(_VT_ARRAY_DISPATCH, ())  # 复用的填充边界 VARIANT
+        self._known_layers = set()  # 已确认存在的图层名
         self.entities = {}  # 存储已创建图形的实体引用，用于后续修改
+        self._ensured_dirs = set()  # 已确认存在的输出目录
+        self._batch_depth = 0  # batch() 嵌套深度
+        self._dirty = False  # batch() 期间是否有被推迟的视图刷新
         # 从配置文件加载参数
         self.startup_wait_time = config["cad"]["startup_wait_time"]
         self.command_delay = config["cad"]["command_delay"]
         # 获取CAD类型
         self.cad_type = config["cad"]["type"]
-        # 有效的线宽值列表
-        self.valid_lineweights = [0, 5, 9, 13, 15, 18, 20, 25, 30, 35, 40, 50, 53, 60, 70, 80, 90, 100, 106, 120, 140, 158, 200, 211]
+        # 根据配置的CAD类型选择应用程序标识符，未知类型按 AutoCAD 处理
+        self._app_id, self._app_name = _CAD_APP_IDS.get(self.cad_type.lower(), _CAD_APP_IDS["autocad"])
         logger.info("CAD控制器已初始化")
     
     def start_cad(self) -> bool:
         """启动CAD并创建或打开一个文档"""
+        # 存储旧实例引用（如果有）以便后续清理
+        old_app = None
         try:
-            # 初始化COM
-            pythoncom.CoInitialize()
+            # 初始化COM (每个线程只需一次)
+            if not getattr(_com_state, "initialized", False):
+                pythoncom.CoInitialize()
+                _com_state.initialized = True
             
-            # 存储旧实例引用（如果有）以便后续清理
-            old_app = None
             if self.app is not None:
                 old_app = self.app
                 self.app = None
                 self.doc = None
+                self.model_space = None
+                self.layers = None
+                self._viewport = None
+                self._known_layers = set()
             
             try:
-                # 根据配置的CAD类型选择不同的应用程序标识符
-                app_id = "AutoCAD.Application"
-                app_name = "AutoCAD"
-                
-                if self.cad_type.lower() == "autocad":
-                    app_id = "AutoCAD.Application"
-                    app_name = "AutoCAD"
-                elif self.cad_type.lower() == "gcad":
-                    app_id = "GCAD.Application"
-                    app_name = "浩辰CAD"
-                elif self.cad_type.lower() == "gstarcad":
-                    app_id = "GCAD.Application"
-                    app_name = "浩辰CAD"
-                elif self.cad_type.lower() == "zwcad":
-                    app_id = "ZWCAD.Application"
-                    app_name = "中望CAD"
+                app_id, app_name = self._app_id, self._app_name
                 
                 # 尝试连接到已运行的CAD实例
                 logger.info(f"尝试连接现有{app_name}实例...")
                 try:
-                    self.app = win32com.client.GetActiveObject(app_id)
+                    self.app = self._early_bind(win32com.client.GetActiveObject(app_id))
                     logger.info(f"成功连接到已运行的{app_name}实例")
                 except Exception as e:
                     logger.info(f"未找到运行中的{app_name}实例，将尝试启动新实例: {str(e)}")  
@@ -91,12 +148,16 @@ class CADController:
                     # 如果获取文档失败，强制创建新文档
                     logger.warning(f"获取文档失败，尝试创建新文档: {str(doc_ex)}")
                     try:
-                        # 关闭所有打开的文档
-                        for i in range(self.app.Documents.Count):
+                        # 关闭所有打开的文档：每次关闭第一个，直到集合为空；
+                        # 关闭失败时立即停止，并限制次数避免死循环
+                        documents = self.app.Documents
+                        for _ in range(32):
+                            if documents.Count == 0:
+                                break
                             try:
-                                self.app.Documents.Item(0).Close(False)  # 不保存
-                            except:
-                                pass
+                                documents.Item(0).Close(False)  # 不保存
+                            except Exception:
+                                break
                         
                         # 创建新文档
                         self.doc = self.app.Documents.Add()
@@ -109,40 +170,20 @@ class CADController:
                 logger.info(f"连接失败，正在启动新的CAD实例: {str(app_ex)}")
                 try:
                     # 根据配置的CAD类型启动相应的应用程序
-                    app_id = "AutoCAD.Application"
-                    app_name = "AutoCAD"
-                    
-                    if self.cad_type.lower() == "autocad":
-                        app_id = "AutoCAD.Application"
-                        app_name = "AutoCAD"
-                    elif self.cad_type.lower() == "gcad":
-                        app_id = "GCAD.Application"
-                        app_name = "浩辰CAD"
-                    elif self.cad_type.lower() == "gstarcad":
-                        app_id = "GCAD.Application"
-                        app_name = "浩辰CAD"
-                    elif self.cad_type.lower() == "zwcad":
-                        app_id = "ZWCAD.Application"
-                        app_name = "中望CAD"
+                    app_id, app_name = self._app_id, self._app_name
                     
                     logger.info(f"正在启动{app_name}实例...")
-                    self.app = win32com.client.Dispatch(app_id)
+                    self.app = self._early_bind(app_id)
                     self.app.Visible = True
                     
-                    # 等待CAD启动
-                    time.sleep(self.startup_wait_time)  # 使用配置的等待时间
-                    
-                    # 创建新文档
-                    logger.info("尝试创建新文档...")
+                    # 等待CAD启动，活动文档可用后立即继续
+                    logger.info("等待活动文档...")
                     # self.doc = self.app.Documents.Add()
-                    self.doc = self.app.ActiveDocument
+                    self.doc = self._wait_ready(timeout=self.startup_wait_time + 5)
                 except Exception as new_app_ex:
                     logger.error(f"启动新CAD实例失败: {str(new_app_ex)}")
                     raise
             
-            # 额外安全检查和等待
-            time.sleep(2)  # 给CAD更多时间处理文档创建
-            
             if self.doc is None:
                 raise Exception("无法获取有效的Document对象")
             
@@ -154,6 +195,12 @@ class CADController:
                 logger.error(f"无法读取文档名称: {str(name_ex)}")
                 raise Exception("文档对象无效")
             
+            # 缓存常用 COM 引用，避免每次绘图都经过 IDispatch 取属性
+            self.model_space = self.doc.ModelSpace
+            self.layers = self.doc.Layers
+            self._viewport = self.doc.ActiveViewport
+            self._known_layers = set()
+            
             logger.info("CAD已成功启动和准备")
             return True
             
@@ -169,6 +216,41 @@ class CADController:
                     pass
     
         
+    def _wait_ready(self, timeout: float = 30) -> Any:
+        """轮询新启动的 CAD 实例，活动文档可读取后立即返回该文档
+        
+        Args:
+            timeout: 最长等待秒数
+            
+        Returns:
+            活动文档对象；超时抛出 TimeoutError
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                doc = self.app.ActiveDocument
+                doc.Name  # 能读取名称说明文档已可用
+                return doc
+            except Exception:
+                time.sleep(0.05)
+        raise TimeoutError(f"等待 CAD 就绪超时 ({timeout} 秒)")
+    
+    @staticmethod
+    def _early_bind(app: Any) -> Any:
+        """获取早绑定的 COM 对象
+        
+        通过 makepy 生成的类型库包装 (win32com/gen_py) 按 dispid 直接调用，
+        省去后期绑定每次访问属性时的 GetIDsOfNames 查询；类型库不可用时
+        退回后期绑定。
+        """
+        try:
+            return win32com.client.gencache.EnsureDispatch(app)
+        except Exception as e:
+            logger.warning(f"早绑定失败，使用后期绑定: {str(e)}")
+            if isinstance(app, str):
+                return win32com.client.Dispatch(app)
+            return app
+    
     def is_running(self) -> bool:
         """检查CAD是否正在运行"""
         return self.app is not None and self.doc is not None
@@ -180,8 +262,11 @@ class CADController:
             return False
             
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # 确保目录存在 (同一目录只创建一次)
+            directory = os.path.dirname(file_path)
+            if directory and directory not in self._ensured_dirs:
+                os.makedirs(directory, exist_ok=True)
+                self._ensured_dirs.add(directory)
             
             # 保存文件
             self.doc.SaveAs(file_path)
@@ -193,17 +278,54 @@ class CADController:
             return False
     
     def refresh_view(self) -> None:
-        """刷新CAD视图"""
+        """刷新CAD视图
+        
+        在 batch() 中只做标记，退出最外层 batch() 时统一刷新一次
+        """
+        if self._batch_depth > 0:
+            self._dirty = True
+            return
         if self.is_running():
             try:
                 self.doc.Regen(1)  # acAllViewports = 1
             except Exception as e:
                 logger.error(f"刷新视图失败: {str(e)}")
     
+    def _point_variant(self, point: Tuple[float, float, float]) -> Any:
+        """将三维坐标包装为 COM 所需的 VT_ARRAY|VT_R8 VARIANT"""
+        return _VARIANT(_VT_ARRAY_R8, tuple(point))
+    
+    def _apply_style(self, entity: Any, layer: str, color: int, lineweight) -> None:
+        """设置实体的图层、颜色和线宽，值为 None 的属性保持默认"""
+        if layer:
+            # 确保图层存在
+            self.create_layer(layer)
+            entity.Layer = layer
+        if color is not None:
+            entity.Color = color
+        if lineweight is not None:
+            entity.LineWeight = self.validate_lineweight(lineweight)
+    
+    @contextmanager
+    def batch(self):
+        """批量绘图上下文
+        
+        期间的 refresh_view() 调用被推迟，最外层退出时只执行一次 Regen，
+        支持嵌套。
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._dirty = False
+                self.refresh_view()
+    
     def validate_lineweight(self, lineweight) -> int:
         """验证并返回有效的线宽值
         
-        如果提供的线宽值不在有效值列表中，则返回默认值0
+        如果提供的线宽值不在有效值集合中，则返回默认值0
         
         Args:
             lineweight: 要验证的线宽值
@@ -214,8 +336,8 @@ class CADController:
         if lineweight is None:
             return None
             
-        # 检查线宽是否在有效值列表中
-        if lineweight in self.valid_lineweights:
+        # 检查线宽是否在有效值集合中
+        if lineweight in self._VALID_LINEWEIGHTS:
             return lineweight
         else:
             logger.warning(f"线宽值 {lineweight} 无效，将使用默认值 0")
@@ -235,37 +357,85 @@ class CADController:
                 end_point = (end_point[0], end_point[1], 0)
       
             # 使用VARIANT包装坐标点数据
-            start_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                               [start_point[0], start_point[1], start_point[2]])
-            end_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                             [end_point[0], end_point[1], end_point[2]])
+            start_array = self._point_variant(start_point)
+            end_array = self._point_variant(end_point)
             
             # 添加直线
-            line = self.doc.ModelSpace.AddLine(start_array, end_array)
+            line = self.model_space.AddLine(start_array, end_array)
+            
+            # 设置图层、颜色和线宽
+            self._apply_style(line, layer, color, lineweight)
+            
+            # 刷新视图
+            self.refresh_view()
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已绘制直线: 起点{start_point}, 终点{end_point}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            return line
             
-            # 如果指定了图层，设置图层
+        except Exception as e:
+            logger.error(f"绘制直线时出错: {str(e)}")
+            return None
+    
+    def draw_lines_bulk(self, segments: List[Tuple[Tuple[float, float, float], Tuple[float, float, float]]],
+                        layer: str = None, color: int = None, lineweight=None) -> Optional[List[Any]]:
+        """批量绘制同一样式的直线
+        
+        先把图层、颜色和线宽设为当前值，新建直线直接继承，每条直线只需
+        一次 AddLine 调用；结束后恢复原来的当前值，并只刷新一次视图。
+        
+        Args:
+            segments: [(起点, 终点), ...]，点为二维或三维坐标元组
+            
+        Returns:
+            创建的直线对象列表；CAD 未运行或任一步失败时返回 None
+        """
+        if not self.is_running():
+            return None
+        
+        lines = []
+        saved_layer = None
+        saved_vars = {}
+        try:
             if layer:
-                # 确保图层存在
+                saved_layer = self.doc.ActiveLayer
                 self.create_layer(layer)
-                # 设置实体的图层
-                line.Layer = layer
-         
-            # 如果指定了颜色，设置颜色
+                self.doc.ActiveLayer = self.layers.Item(layer)
             if color is not None:
-                line.Color = color
-
+                saved_vars["CECOLOR"] = self.doc.GetVariable("CECOLOR")
+                self.doc.SetVariable("CECOLOR", self._CECOLOR_NAMES.get(color, str(color)))
             if lineweight is not None:
-                line.LineWeight = self.validate_lineweight(lineweight)
+                saved_vars["CELWEIGHT"] = self.doc.GetVariable("CELWEIGHT")
+                self.doc.SetVariable("CELWEIGHT", self.validate_lineweight(lineweight))
+            
+            add_line = self.model_space.AddLine
+            for start_point, end_point in segments:
+                # 确保点是三维的
+                if len(start_point) == 2:
+                    start_point = (start_point[0], start_point[1], 0)
+                if len(end_point) == 2:
+                    end_point = (end_point[0], end_point[1], 0)
+                start_array = self._point_variant(start_point)
+                end_array = self._point_variant(end_point)
+                lines.append(add_line(start_array, end_array))
             
             # 刷新视图
             self.refresh_view()
-
-            logger.debug(f"已绘制直线: 起点{start_point}, 终点{end_point}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
-            return line
             
+            logger.info(f"已批量绘制直线: {len(lines)}条, 图层{layer if layer else '默认'}")
         except Exception as e:
-            logger.error(f"绘制直线时出错: {str(e)}")
+            logger.error(f"批量绘制直线时出错: {str(e)}")
             return None
+        finally:
+            # 恢复原来的当前图层、颜色和线宽
+            try:
+                for name, value in saved_vars.items():
+                    self.doc.SetVariable(name, value)
+                if saved_layer is not None:
+                    self.doc.ActiveLayer = saved_layer
+            except Exception as e:
+                logger.warning(f"恢复绘图设置时出错: {str(e)}")
+        return lines
     
     def draw_circle(self, center: Tuple[float, float, float], 
                    radius: float, layer: str = None, color: int = None, lineweight=None) -> Any:
@@ -279,30 +449,19 @@ class CADController:
                 center = (center[0], center[1], 0)
             
             # 使用VARIANT包装坐标点数据
-            center_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                               [center[0], center[1], center[2]])
+            center_array = self._point_variant(center)
             
             # 添加圆
-            circle = self.doc.ModelSpace.AddCircle(center_array, radius)
+            circle = self.model_space.AddCircle(center_array, radius)
             
-            # 如果指定了图层，设置图层
-            if layer:
-                # 确保图层存在
-                self.create_layer(layer)
-                # 设置实体的图层
-                circle.Layer = layer
-            
-            # 如果指定了颜色，设置颜色
-            if color is not None:
-                circle.Color = color
-
-            if lineweight is not None:
-                circle.LineWeight = self.validate_lineweight(lineweight)
+            # 设置图层、颜色和线宽
+            self._apply_style(circle, layer, color, lineweight)
             
             # 刷新视图
             self.refresh_view()
             
-            logger.debug(f"已绘制圆: 中心{center}, 半径{radius}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已绘制圆: 中心{center}, 半径{radius}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
             return circle
             
         except Exception as e:
@@ -321,34 +480,23 @@ class CADController:
                 center = (center[0], center[1], 0)
                 
             # 将角度转换为弧度
-            start_rad = math.radians(start_angle)
-            end_rad = math.radians(end_angle)
+            start_rad = start_angle * _DEG2RAD
+            end_rad = end_angle * _DEG2RAD
             
             # 使用VARIANT包装坐标点数据
-            center_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                               [center[0], center[1], center[2]])
+            center_array = self._point_variant(center)
             
             # 添加圆弧
-            arc = self.doc.ModelSpace.AddArc(center_array, radius, start_rad, end_rad)
-            
-            # 如果指定了图层，设置图层
-            if layer:
-                # 确保图层存在
-                self.create_layer(layer)
-                # 设置实体的图层
-                arc.Layer = layer
+            arc = self.model_space.AddArc(center_array, radius, start_rad, end_rad)
             
-            # 如果指定了颜色，设置颜色
-            if color is not None:
-                arc.Color = color
-
-            if lineweight is not None:
-                arc.LineWeight = self.validate_lineweight(lineweight)
+            # 设置图层、颜色和线宽
+            self._apply_style(arc, layer, color, lineweight)
             
             # 刷新视图
             self.refresh_view()
             
-            logger.debug(f"已绘制圆弧: 中心{center}, 半径{radius}, 起始角度{start_angle}, 结束角度{end_angle}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已绘制圆弧: 中心{center}, 半径{radius}, 起始角度{start_angle}, 结束角度{end_angle}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
             return arc
         except Exception as e:
             logger.error(f"绘制圆弧失败: {str(e)}")
@@ -368,94 +516,134 @@ class CADController:
             
             if rotation is None:
                 rotation = 0
+            
+            # 提前检查轴长，避免进入 COM 异常路径
+            if major_axis <= 0 or minor_axis <= 0:
+                logger.error(f"绘制椭圆失败: 轴长必须为正数 (长轴{major_axis}, 短轴{minor_axis})")
+                return None
+            # 短轴比长轴长时交换两轴并旋转 90 度 (AutoCAD 要求轴比不大于 1)
+            if minor_axis > major_axis:
+                major_axis, minor_axis = minor_axis, major_axis
+                rotation += 90
 
             # 将旋转角度转换为弧度
-            rotation_rad = math.radians(rotation)
+            rotation_rad = rotation * _DEG2RAD
             
             # 使用VARIANT包装坐标点数据
-            center_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                               [center[0], center[1], center[2]])
+            center_array = self._point_variant(center)
             
-            # 计算椭圆的主轴向量
-            major_x = major_axis * math.cos(rotation_rad)
-            major_y = major_axis * math.sin(rotation_rad)
-            major_vector = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                               [major_x, major_y, 0])
+            # 计算椭圆的主轴向量 (一次求出 cos 与 sin)
+            direction = cmath.rect(major_axis, rotation_rad)
+            major_vector = self._point_variant((direction.real, direction.imag, 0.0))
             
             # 添加椭圆
-            ellipse = self.doc.ModelSpace.AddEllipse(center_array, major_vector, minor_axis / major_axis)
+            ellipse = self.model_space.AddEllipse(center_array, major_vector, minor_axis / major_axis)
             
-            # 如果指定了图层，设置图层
-            if layer:
-                # 确保图层存在
-                self.create_layer(layer)
-                # 设置实体的图层
-                ellipse.Layer = layer
-            
-            # 如果指定了颜色，设置颜色
-            if color is not None:
-                ellipse.Color = color
-
-            if lineweight is not None:
-                ellipse.LineWeight = self.validate_lineweight(lineweight)
+            # 设置图层、颜色和线宽
+            self._apply_style(ellipse, layer, color, lineweight)
             
             # 刷新视图
             self.refresh_view()
             
-            logger.debug(f"已绘制椭圆: 中心{center}, 长轴{major_axis}, 短轴{minor_axis}, 旋转角度{rotation}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已绘制椭圆: 中心{center}, 长轴{major_axis}, 短轴{minor_axis}, 旋转角度{rotation}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
             return ellipse
         except Exception as e:
             logger.error(f"绘制椭圆失败: {str(e)}")
             return None
     
     def draw_polyline(self, points: List[Tuple[float, float, float]], closed: bool = False, layer: str = None, color: int = None, lineweight=None) -> Any:
-        """绘制多段线"""
+        """绘制多段线
+        
+        points 可以是点元组列表，也可以是形状为 (N, 2) 或 (N, 3) 的 numpy 数组
+        """
         if not self.is_running():
             return None
             
         try:
-            # 确保所有点都是三维的
-            processed_points = []
-            for point in points:
-                if len(point) == 2:
-                    processed_points.append((point[0], point[1], 0))
-                else:
-                    processed_points.append(point)
-            
-            # 创建点数组
-            point_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                                [coord for point in processed_points for coord in point])
-            
-            # 添加多段线
-            polyline = self.doc.ModelSpace.AddPolyline(point_array)
-            
-            # 如果需要闭合
-            if closed and len(processed_points) > 2:
-                polyline.Closed = True
-            
-            # 如果指定了图层，设置图层
-            if layer:
-                # 确保图层存在
-                self.create_layer(layer)
-                # 设置实体的图层
-                polyline.Layer = layer
+            polyline = self._draw_polyline_impl(self._flatten_polyline_points(points), closed, layer, color, lineweight)
             
-            # 如果指定了颜色，设置颜色
-            if color is not None:
-                polyline.Color = color
+            # 刷新视图
+            self.refresh_view()
 
-            if lineweight is not None:
-                polyline.LineWeight = self.validate_lineweight(lineweight)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已绘制多段线: {len(points)}个点, {'闭合' if closed else '不闭合'}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            return polyline
+        except Exception as e:
+            logger.error(f"绘制多段线时出错: {str(e)}")
+            return None
+    
+    def draw_polyline_flat(self, flat_xyz: Any, closed: bool = False, layer: str = None, color: int = None, lineweight=None) -> Any:
+        """按展平的 x, y, z 坐标序列绘制多段线
+        
+        Args:
+            flat_xyz: [x0, y0, z0, x1, y1, z1, ...]，可以是 array('d') 或一维 numpy 数组
+            
+        Returns:
+            成功返回多段线对象，失败返回None
+        """
+        if not self.is_running():
+            return None
+            
+        try:
+            if np is not None and isinstance(flat_xyz, np.ndarray):
+                flat_xyz = array.array('d', np.ascontiguousarray(flat_xyz, dtype=np.float64).tobytes())
+            polyline = self._draw_polyline_impl(flat_xyz, closed, layer, color, lineweight)
             
             # 刷新视图
             self.refresh_view()
 
-            logger.debug(f"已绘制多段线: {len(points)}个点, {'闭合' if closed else '不闭合'}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已绘制多段线: {len(flat_xyz) // 3}个点, {'闭合' if closed else '不闭合'}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
             return polyline
         except Exception as e:
             logger.error(f"绘制多段线时出错: {str(e)}")
             return None
     
+    def _flatten_polyline_points(self, points: Any) -> array.array:
+        """把点集补齐为三维并展平为 array('d')"""
+        # 点数较多的列表先整体转换为数组，维度不一致时退回逐点处理
+        if np is not None and not isinstance(points, np.ndarray) and len(points) >= _NUMPY_MIN_POINTS:
+            try:
+                points = np.asarray(points, dtype=np.float64)
+            except ValueError:
+                pass
+        
+        # numpy 数组整体补齐 z 列后直接展平，不逐点处理
+        if np is not None and isinstance(points, np.ndarray):
+            if points.shape[1] == 2:
+                points = np.hstack([points, np.zeros((len(points), 1))])
+            return array.array('d', np.ascontiguousarray(points, dtype=np.float64).tobytes())
+        
+        # 确保所有点都是三维的
+        processed_points = []
+        for point in points:
+            if len(point) == 2:
+                processed_points.append((point[0], point[1], 0))
+            else:
+                processed_points.append(point)
+        return array.array('d', itertools.chain.from_iterable(processed_points))
+    
+    def _draw_polyline_impl(self, flat_xyz: array.array, closed: bool, layer: str, color: int, lineweight) -> Any:
+        """创建多段线并设置属性，不刷新视图
+        
+        供 draw_rectangle / draw_hatch 等组合图形使用，由调用方在最后统一刷新一次
+        """
+        # 创建点数组
+        point_array = _VARIANT(_VT_ARRAY_R8, flat_xyz)
+        
+        # 添加多段线
+        polyline = self.model_space.AddPolyline(point_array)
+        
+        # 如果需要闭合
+        if closed and len(flat_xyz) > 6:
+            polyline.Closed = True
+        
+        # 设置图层、颜色和线宽
+        self._apply_style(polyline, layer, color, lineweight)
+        
+        return polyline
+    
     def draw_rectangle(self, corner1: Tuple[float, float, float], 
                       corner2: Tuple[float, float, float], layer: str = None, color: int = None, lineweight=None) -> Any:
         """绘制矩形"""
@@ -473,17 +661,17 @@ class CADController:
             x1, y1, z1 = corner1
             x2, y2, z2 = corner2
             
-            # 创建矩形的四个点
-            points = [
-                (x1, y1, z1),
-                (x2, y1, z1),
-                (x2, y2, z1),
-                (x1, y2, z1),
-                (x1, y1, z1)  # 闭合矩形
-            ]
+            # 直接生成矩形五个顶点 (首尾重合) 的展平坐标
+            flat_xyz = array.array('d', (x1, y1, z1,
+                                         x2, y1, z1,
+                                         x2, y2, z1,
+                                         x1, y2, z1,
+                                         x1, y1, z1))  # 闭合矩形
             
             # 使用多段线绘制矩形
-            return self.draw_polyline(points, True, layer, color, lineweight)
+            polyline = self._draw_polyline_impl(flat_xyz, True, layer, color, lineweight)
+            self.refresh_view()
+            return polyline
         except Exception as e:
             logger.error(f"绘制矩形时出错: {str(e)}")
             return None
@@ -500,31 +688,23 @@ class CADController:
                 position = (position[0], position[1], 0)
             
             # 使用VARIANT包装坐标点数据
-            position_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                                 [position[0], position[1], position[2]])
+            position_array = self._point_variant(position)
                 
             # 添加文本
-            text_obj = self.doc.ModelSpace.AddText(text, position_array, height)
+            text_obj = self.model_space.AddText(text, position_array, height)
             
             # 设置旋转角度
             if rotation != 0:
-                text_obj.Rotation = math.radians(rotation)
-            
-            # 如果指定了图层，设置图层
-            if layer:
-                # 确保图层存在
-                self.create_layer(layer)
-                # 设置实体的图层
-                text_obj.Layer = layer
+                text_obj.Rotation = rotation * _DEG2RAD
             
-            # 如果指定了颜色，设置颜色
-            if color is not None:
-                text_obj.Color = color
+            # 设置图层、颜色和线宽
+            self._apply_style(text_obj, layer, color, None)
             
             # 刷新视图
             self.refresh_view()
                                 
-            logger.debug(f"已添加文本: '{text}', 位置{position}, 高度{height}, 旋转{rotation}度, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已添加文本: '{text}', 位置{position}, 高度{height}, 旋转{rotation}度, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
             return text_obj
         except Exception as e:
             logger.error(f"添加文本时出错: {str(e)}")
@@ -554,40 +734,34 @@ class CADController:
                 return None
                 
             # 创建闭合多段线作为边界
-            closed_polyline = self.draw_polyline(points, closed=True, layer=layer)
+            closed_polyline = self._draw_polyline_impl(self._flatten_polyline_points(points), True, layer, None, None)
             if not closed_polyline:
                 logger.error("创建填充失败: 无法创建边界多段线")
                 return None
-                
+            
             # 创建填充对象 (0表示正常填充，True表示关联边界)
-            hatch = self.doc.ModelSpace.AddHatch(0, pattern_name, True)
-                
+            hatch = self.model_space.AddHatch(0, pattern_name, True)
+            
             # 添加外部边界循环
-            # 使用VARIANT包装对象数组
-            object_ids = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_DISPATCH, [closed_polyline])
-            hatch.AppendOuterLoop(object_ids)
-                
+            # 使用VARIANT包装对象数组 (复用同一个 VARIANT，调用后释放对边界的引用)
+            self._loop_variant.value = (closed_polyline,)
+            hatch.AppendOuterLoop(self._loop_variant)
+            self._loop_variant.value = ()
+            
             # 设置填充图案比例
             hatch.PatternScale = scale
-                
-            # 如果指定了图层，设置图层
-            if layer:
-                # 确保图层存在
-                self.create_layer(layer)
-                # 设置实体的图层
-                hatch.Layer = layer
-                
-            # 如果指定了颜色，设置颜色
-            if color is not None:
-                hatch.Color = color
-                                
+            
+            # 设置图层、颜色和线宽
+            self._apply_style(hatch, layer, color, None)
+                            
             # 更新填充 (计算填充区域)
             hatch.Evaluate()
-            
+        
             # 刷新视图
             self.refresh_view()
-                
-            logger.debug(f"已创建填充: 图案 {pattern_name}, 比例 {scale}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"已创建填充: 图案 {pattern_name}, 比例 {scale}, 图层{layer if layer else '默认'}, 颜色{color if color is not None else '默认'}")
             return hatch
         except Exception as e:
             logger.error(f"创建填充时出错: {str(e)}")
@@ -599,7 +773,12 @@ class CADController:
             return False
             
         try:
-            self.doc.ActiveViewport.ZoomExtents()
+            try:
+                self._viewport.ZoomExtents()
+            except (pythoncom.com_error, AttributeError):
+                # 活动视口可能已切换 (或尚未缓存)，重新获取后再试一次
+                self._viewport = self.doc.ActiveViewport
+                self._viewport.ZoomExtents()
             logger.info("已缩放视图以显示所有对象")
             return True
         except Exception as e:
@@ -610,9 +789,15 @@ class CADController:
         """关闭CAD控制器"""
         try:
             # 释放COM资源
-            if self.app is not None:
-                del self.app
-            pythoncom.CoUninitialize()
+            self.model_space = None
+            self.layers = None
+            self._viewport = None
+            self.app = None
+            self.doc = None
+            # 只释放本线程初始化过的 COM
+            if getattr(_com_state, "initialized", False):
+                pythoncom.CoUninitialize()
+                _com_state.initialized = False
         except:
             pass
 
@@ -630,16 +815,22 @@ class CADController:
         if not self.is_running():
             return False
         
+        # 已确认存在的图层无需再访问 COM
+        if layer_name in self._known_layers:
+            return True
+        
         try:
-            # 检查图层是否已存在
-            for i in range(self.doc.Layers.Count):
-                if self.doc.Layers.Item(i).Name == layer_name:
-                    # 图层已存在，激活它
-                    self.doc.ActiveLayer = self.doc.Layers.Item(i)
-                    return True
+            # 按名称直接查找图层，已存在则激活它
+            try:
+                layer = self.layers.Item(layer_name)
+                self.doc.ActiveLayer = layer
+                self._known_layers.add(layer_name)
+                return True
+            except pythoncom.com_error:
+                pass
                 
             # 创建新图层
-            new_layer = self.doc.Layers.Add(layer_name)
+            new_layer = self.layers.Add(layer_name)
             
             # 图层不设置颜色，设置里面的实体颜色
             # # 设置颜色
@@ -654,6 +845,7 @@ class CADController:
             
             # 设置为当前图层
             self.doc.ActiveLayer = new_layer
+            self._known_layers.add(layer_name)
             logger.info(f"已创建新图层: {layer_name}")  #, 颜色: {color}
             return True
         except Exception as e:
@@ -684,30 +876,19 @@ class CADController:
                     text_position = (text_position[0], text_position[1], 0)
                 
                 # 使用VARIANT包装坐标点数据
-                start_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                                 [start_point[0], start_point[1], start_point[2]])
-                end_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                               [end_point[0], end_point[1], end_point[2]])
-                text_pos_array = win32com.client.VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, 
-                                                     [text_position[0], text_position[1], text_position[2]])
+                start_array = self._point_variant(start_point)
+                end_array = self._point_variant(end_point)
+                text_pos_array = self._point_variant(text_position)
                 
                 # 添加对齐标注
-                dimension = self.doc.ModelSpace.AddDimAligned(start_array, end_array, text_pos_array)
+                dimension = self.model_space.AddDimAligned(start_array, end_array, text_pos_array)
                 
                 # 设置文字高度
                 if textheight is not None:
                     dimension.TextHeight = textheight
                 
-                # 如果指定了图层，设置图层
-                if layer:
-                    # 确保图层存在
-                    self.create_layer(layer)
-                    # 设置实体的图层
-                    dimension.Layer = layer
-
-                # 如果指定了颜色，设置颜色
-                if color is not None:
-                    dimension.Color = color
+                # 设置图层、颜色和线宽
+                self._apply_style(dimension, layer, color, None)
                 
                 # 刷新视图
                 self.refresh_view()
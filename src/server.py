@@ -1,69 +1,139 @@
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple, Union
+import threading
+from typing import Annotated, Any, Callable, Dict, List, Optional, Tuple, Union
 
 from mcp.server import FastMCP
+from pydantic import Field
 
-from cad_controller import CADController
+try:
+    import numpy as np
+except ImportError:  # numpy 随 ezdxf 安装，缺失时逐点转换
+    np = None
 
-# 日志配置
+from cad_controller import HAS_EZDXF, CADController
+
+
+def _parse_log_level(value: str) -> Optional[int]:
+    """解析日志级别名称 (不区分大小写) 或数值，无法识别时返回 None"""
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.upper())
+    return level if isinstance(level, int) else None
+
+
+# 日志配置，级别可通过 CAD_MCP_LOG_LEVEL 调整（默认 WARNING，避免逐条 INFO 输出到 stderr）
+_log_level_env = os.environ.get("CAD_MCP_LOG_LEVEL", "WARNING")
+_log_level = _parse_log_level(_log_level_env)
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.WARNING if _log_level is None else _log_level,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     handlers=[logging.StreamHandler()],
 )
 logger = logging.getLogger("mcp_cad_server")
+if _log_level is None:
+    logger.warning(f"无效的 CAD_MCP_LOG_LEVEL: {_log_level_env!r}，使用 WARNING")
 
 mcp = FastMCP(name="CAD MCP Server")
 
+# 无附加信息的工具结果共用这两个字典，调用方不得修改
+_OK: Dict[str, Any] = {"ok": True}
+_FAIL: Dict[str, Any] = {"ok": False}
+
+# 二维或三维点坐标；长度在 FastMCP 生成的校验模型中检查，所有工具共用同一类型
+Point = Annotated[List[float], Field(min_length=2, max_length=3)]
+
 _cad: Optional[CADController] = None
+_cad_lock = threading.Lock()
+
+# process_command 可调用的控制器方法，其余属性（close、start_cad 等）不对外暴露
+_ALLOWED_ACTIONS = CADController.DRAW_ACTIONS | {"save_drawing", "create_layer"}
+_ACTIONS: Dict[str, Callable[..., Any]] = {}
 
 
 def _get_cad() -> CADController:
     global _cad
-    if _cad is None:
-        _cad = CADController()
-        started = _cad.start_cad()
-        if not started:
-            raise RuntimeError("CAD 启动失败")
+    cad = _cad
+    if cad is not None:
+        return cad
+    # 双重检查：并发的首次调用只启动一个 CAD 实例
+    with _cad_lock:
+        if _cad is None:
+            cad = CADController()
+            started = cad.start_cad()
+            if not started:
+                raise RuntimeError("CAD 启动失败")
+            # 后端方法在 start_cad() 时绑定，此后解析一次即可
+            _ACTIONS.update((name, getattr(cad, name)) for name in _ALLOWED_ACTIONS)
+            _cad = cad
     return _cad
 
 
+def _warm_start() -> None:
+    """预先启动 CAD，首个工具调用无需等待启动"""
+    try:
+        _get_cad()
+    except RuntimeError as e:
+        logger.error(f"预启动 CAD 失败: {str(e)}")
+
+
 def _as_point(point: Union[List[float], Tuple[float, float, float]]) -> Tuple[float, float, float]:
     if len(point) == 2:
         return (float(point[0]), float(point[1]), 0.0)
     return (float(point[0]), float(point[1]), float(point[2]))
 
 
+def _as_points(points: List[List[float]]) -> Any:
+    """批量转换点列表
+
+    安装了 numpy 时一次性转换为 (N, 3) float64 数组，控制器可直接使用，
+    不再逐点构造元组；二维、三维点混合等情况退回逐点转换。
+    """
+    if np is None:
+        return [_as_point(p) for p in points]
+    try:
+        arr = np.asarray(points, dtype=np.float64)
+    except ValueError:
+        return [_as_point(p) for p in points]
+    if arr.ndim != 2 or arr.shape[1] not in (2, 3):
+        return [_as_point(p) for p in points]
+    if arr.shape[1] == 3:
+        return arr
+    normalized = np.zeros((arr.shape[0], 3))
+    normalized[:, :2] = arr
+    return normalized
+
+
 @mcp.tool(description="绘制直线。参数: start_point, end_point, layer?, color?, lineweight?")
 def draw_line(
-    start_point: List[float],
-    end_point: List[float],
+    start_point: Point,
+    end_point: Point,
     layer: Optional[str] = None,
     color: Optional[int] = None,
     lineweight: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
     result = cad.draw_line(_as_point(start_point), _as_point(end_point), layer, color, lineweight)
-    return {"ok": result is not None}
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="绘制圆。参数: center, radius, layer?, color?, lineweight?")
 def draw_circle(
-    center: List[float],
+    center: Point,
     radius: float,
     layer: Optional[str] = None,
     color: Optional[int] = None,
     lineweight: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
-    result = cad.draw_circle(_as_point(center), float(radius), layer, color, lineweight)
-    return {"ok": result is not None}
+    result = cad.draw_circle(_as_point(center), radius, layer, color, lineweight)
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="绘制圆弧。参数: center, radius, start_angle, end_angle, layer?, color?, lineweight?")
 def draw_arc(
-    center: List[float],
+    center: Point,
     radius: float,
     start_angle: float,
     end_angle: float,
@@ -72,40 +142,40 @@ def draw_arc(
     lineweight: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
-    result = cad.draw_arc(_as_point(center), float(radius), float(start_angle), float(end_angle), layer, color, lineweight)
-    return {"ok": result is not None}
+    result = cad.draw_arc(_as_point(center), radius, start_angle, end_angle, layer, color, lineweight)
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="绘制矩形。参数: corner1, corner2, layer?, color?, lineweight?")
 def draw_rectangle(
-    corner1: List[float],
-    corner2: List[float],
+    corner1: Point,
+    corner2: Point,
     layer: Optional[str] = None,
     color: Optional[int] = None,
     lineweight: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
     result = cad.draw_rectangle(_as_point(corner1), _as_point(corner2), layer, color, lineweight)
-    return {"ok": result is not None}
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="绘制多段线。参数: points, closed?, layer?, color?, lineweight?")
 def draw_polyline(
-    points: List[List[float]],
+    points: List[Point],
     closed: bool = False,
     layer: Optional[str] = None,
     color: Optional[int] = None,
     lineweight: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
-    pts = [_as_point(p) for p in points]
+    pts = _as_points(points)
     result = cad.draw_polyline(pts, closed, layer, color, lineweight)
-    return {"ok": result is not None}
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="添加文本。参数: position, text, height?, rotation?, layer?, color?")
 def draw_text(
-    position: List[float],
+    position: Point,
     text: str,
     height: float = 2.5,
     rotation: float = 0.0,
@@ -113,37 +183,37 @@ def draw_text(
     color: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
-    result = cad.draw_text(_as_point(position), text, float(height), float(rotation), layer, color)
-    return {"ok": result is not None}
+    result = cad.draw_text(_as_point(position), text, height, rotation, layer, color)
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="绘制填充图案。参数: points, pattern_name?, scale?, layer?, color?")
 def draw_hatch(
-    points: List[List[float]],
+    points: List[Point],
     pattern_name: str = "SOLID",
     scale: float = 1.0,
     layer: Optional[str] = None,
     color: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
-    pts = [_as_point(p) for p in points]
-    result = cad.draw_hatch(pts, pattern_name, float(scale), layer, color)
-    return {"ok": result is not None}
+    pts = _as_points(points)
+    result = cad.draw_hatch(pts, pattern_name, scale, layer, color)
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="添加线性标注。参数: start_point, end_point, text_position?, textheight?, layer?, color?")
 def add_dimension(
-    start_point: List[float],
-    end_point: List[float],
-    text_position: Optional[List[float]] = None,
+    start_point: Point,
+    end_point: Point,
+    text_position: Optional[Point] = None,
     textheight: float = 5.0,
     layer: Optional[str] = None,
     color: Optional[int] = None,
 ) -> Dict[str, Any]:
     cad = _get_cad()
     text_pos = _as_point(text_position) if text_position else None
-    result = cad.add_dimension(_as_point(start_point), _as_point(end_point), text_pos, float(textheight), layer, color)
-    return {"ok": result is not None}
+    result = cad.add_dimension(_as_point(start_point), _as_point(end_point), text_pos, textheight, layer, color)
+    return _OK if result is not None else _FAIL
 
 
 @mcp.tool(description="保存图纸。参数: file_path?（可为空，使用默认输出路径）")
@@ -157,17 +227,36 @@ def save_drawing(file_path: Optional[str] = None) -> Dict[str, Any]:
 def create_layer(layer_name: str, color: int = 7) -> Dict[str, Any]:
     cad = _get_cad()
     ok = cad.create_layer(layer_name, color)
-    return {"ok": ok}
+    return _OK if ok else _FAIL
+
+
+@mcp.tool(description="批量绘图。参数: operations（[{action, params}, ...]，格式与 process_command 相同）, regen?")
+def draw_batch(operations: List[Dict[str, Any]], regen: bool = True) -> Dict[str, Any]:
+    """在一次工具调用内按顺序执行多条绘图命令。
+
+    整批共用一次 CAD 批量上下文，结束时只重生成一次视图（regen=False 时跳过），
+    results 与 operations 一一对应。
+    """
+    cad = _get_cad()
+    results = [result is not None for result in cad.draw_batch(operations, regen)]
+    return {"ok": all(results), "results": results}
 
 
-@mcp.tool(description="处理结构化命令。参数: {action, params}")
-def process_command(command: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+@mcp.tool(description="处理结构化命令。参数: {action, params} 或其列表")
+def process_command(command: Union[str, Dict[str, Any], List[Dict[str, Any]]]) -> Dict[str, Any]:
     """简单命令处理器。
 
     支持结构化命令：
     {"action": "draw_line", "params": {...}}
+    action 仅限绘图、保存和创建图层方法。命令列表在同一个 CAD 批量上下文中
+    依次执行，结束时只重生成一次视图。
     """
-    cad = _get_cad()
+    cad = _get_cad()  # 同时确保 _ACTIONS 已填充
+
+    if isinstance(command, list):
+        with cad.batch():
+            results = [process_command(item) for item in command]
+        return {"ok": all(r["ok"] for r in results), "results": results}
 
     if isinstance(command, dict):
         action = command.get("action")
@@ -175,13 +264,13 @@ def process_command(command: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
         if not action:
             return {"ok": False, "error": "missing action"}
 
-        if not hasattr(cad, action):
+        func = _ACTIONS.get(action)
+        if func is None:
             return {"ok": False, "error": f"unsupported action: {action}"}
 
-        func = getattr(cad, action)
         try:
             result = func(**params)
-            return {"ok": result is not None}
+            return _OK if result is not None else _FAIL
         except Exception as exc:
             return {"ok": False, "error": str(exc)}
 
@@ -192,4 +281,14 @@ def process_command(command: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
 
 
 if __name__ == "__main__":
-    mcp.run("stdio")
+    # CAD_EAGER_START=0 时在首个工具调用时才启动 CAD
+    if os.environ.get("CAD_EAGER_START", "1") != "0":
+        if HAS_EZDXF:
+            # ezdxf 文档可跨线程使用，在后台创建，不阻塞 stdio 握手
+            threading.Thread(target=_warm_start, name="cad-warm-start", daemon=True).start()
+        else:
+            # COM 对象属于创建它的线程，需在处理工具调用的主线程上启动
+            _warm_start()
+    # CAD_MCP_TRANSPORT 可选 stdio（默认）、sse、streamable-http；
+    # HTTP 传输的监听地址由 FastMCP 的 FASTMCP_HOST / FASTMCP_PORT 配置
+    mcp.run(os.environ.get("CAD_MCP_TRANSPORT", "stdio"))